@@ -5,6 +5,7 @@ document.addEventListener('DOMContentLoaded', function() {
   const skillsBtn = document.getElementById('skillsBtn');
   const keywordsBtn = document.getElementById('keywordsBtn');
   const scoreBtn = document.getElementById('scoreBtn');
+  const reportBtn = document.getElementById('reportBtn');
   const generateBtn = document.getElementById('generateBtn');
   const responseContainer = document.getElementById('responseContainer');
   const responseText = document.getElementById('responseText');
@@ -23,39 +24,70 @@ document.addEventListener('DOMContentLoaded', function() {
     downloadContainer.style.display = 'none';
   }
 
+  // A busy backend answers 429/503 with retry_after; tell the user when to try again.
+  function errorMessage(data) {
+    return data.retry_after ? `${data.error} Try again in ${data.retry_after} seconds.` : data.error;
+  }
+
   function showProgress(message, percentage) {
     progressContainer.style.display = 'block';
     progressText.textContent = message;
     progressBarFill.style.width = `${percentage}%`;
   }
 
-  function handleButtonClick(endpoint) {
-    const jobDescription = jobDescriptionInput.value;
+  // The backend keeps parsed resumes by ID, so a file it has already seen is not uploaded again.
+  let uploadedResume = null;
+
+  resumeFileInput.addEventListener('change', () => { uploadedResume = null; });
+
+  function buildFormData() {
     const resumeFile = resumeFileInput.files[0];
+    const formData = new FormData();
+    formData.append('job_description', jobDescriptionInput.value);
+    if (uploadedResume && uploadedResume.file === resumeFile) {
+      formData.append('resume_id', uploadedResume.id);
+    } else {
+      formData.append('resume', resumeFile);
+    }
+    return formData;
+  }
+
+  function rememberResume(data) {
+    if (data.resume_id) {
+      uploadedResume = { file: resumeFileInput.files[0], id: data.resume_id };
+    }
+  }
+
+  function postForm(endpoint) {
+    const url = `${backendUrl}/${endpoint}`;
+    return fetch(url, { method: 'POST', body: buildFormData() })
+    .then(response => {
+      if (response.status === 404 && uploadedResume) {
+        uploadedResume = null; // Evicted on the backend; send the file again.
+        return fetch(url, { method: 'POST', body: buildFormData() });
+      }
+      return response;
+    });
+  }
 
-    if (!jobDescription || !resumeFile) {
+  function handleButtonClick(endpoint) {
+    if (!jobDescriptionInput.value || !resumeFileInput.files[0]) {
       alert('Please enter the job description and upload your resume.');
       return;
     }
 
-    const formData = new FormData();
-    formData.append('job_description', jobDescription);
-    formData.append('resume', resumeFile);
-
     showProgress(`Processing...`, 50); // Show some initial progress
 
-    fetch(`${backendUrl}/${endpoint}`, {
-      method: 'POST',
-      body: formData,
-    })
+    postForm(endpoint)
     .then(response => response.json())
     .then(data => {
       if (data.error) {
-        alert(`Error: ${data.error}`);
+        alert(`Error: ${errorMessage(data)}`);
         progressContainer.style.display = 'none';
         responseContainer.style.display = 'none';
         downloadContainer.style.display = 'none';
       } else {
+        rememberResume(data);
         showResponse(data);
         if (data.score !== undefined) {
           progressText.textContent = `Current Match: ${data.score}%`;
@@ -72,50 +104,171 @@ document.addEventListener('DOMContentLoaded', function() {
   }
 
   evaluateBtn.addEventListener('click', () => handleButtonClick('evaluate'));
-  skillsBtn.addEventListener('click', () => handleButtonClick('skills'));
   keywordsBtn.addEventListener('click', () => handleButtonClick('keywords'));
   scoreBtn.addEventListener('click', () => handleButtonClick('score'));
+  reportBtn.addEventListener('click', () => handleButtonClick('report'));
 
-  generateBtn.addEventListener('click', () => {
-    const jobDescription = jobDescriptionInput.value;
-    const resumeFile = resumeFileInput.files[0];
+  function hideAll() {
+    progressContainer.style.display = 'none';
+    responseContainer.style.display = 'none';
+    downloadContainer.style.display = 'none';
+  }
+
+  // Reads a text/event-stream response body and calls onChunk for every streamed piece of text.
+  function readEventStream(response, onChunk) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+
+    function handleEvent(block) {
+      let event = 'message';
+      let data = '';
+      block.split('\n').forEach(line => {
+        if (line.startsWith('event: ')) {
+          event = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+          data += line.slice(6);
+        }
+      });
+      const payload = JSON.parse(data);
+      if (event === 'chunk') {
+        onChunk(payload.text);
+      } else if (event === 'error') {
+        throw new Error(errorMessage(payload));
+      } else if (event === 'done') {
+        result = payload;
+      }
+    }
+
+    function pump() {
+      return reader.read().then(({ done, value }) => {
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          handleEvent(buffer.slice(0, boundary));
+          buffer = buffer.slice(boundary + 2);
+        }
+        return done ? result : pump();
+      });
+    }
 
-    if (!jobDescription || !resumeFile) {
+    return pump();
+  }
+
+  function handleStreamClick(endpoint, message, onDone) {
+    if (!jobDescriptionInput.value || !resumeFileInput.files[0]) {
       alert('Please enter the job description and upload your resume.');
       return;
     }
 
-    const formData = new FormData();
-    formData.append('job_description', jobDescription);
-    formData.append('resume', resumeFile);
-
-    showProgress(`Generating Improved Resume...`, 75);
+    showProgress(message, 5);
+    downloadContainer.style.display = 'none';
+    responseContainer.style.display = 'block';
+    responseText.textContent = '';
+    let received = 0;
 
-    fetch(`${backendUrl}/generate`, {
-      method: 'POST',
-      body: formData,
+    postForm(endpoint)
+    .then(response => {
+      if (!response.ok) {
+        return response.json().then(data => { throw new Error(errorMessage(data) || response.statusText); });
+      }
+      return readEventStream(response, text => {
+        received += text.length;
+        responseText.textContent += text;
+        progressBarFill.style.width = `${Math.min(95, 5 + received / 40)}%`;
+      });
+    })
+    .then(data => {
+      if (!data) {
+        throw new Error('The response stream ended unexpectedly.');
+      }
+      rememberResume(data);
+      onDone(data);
     })
+    .catch(error => {
+      alert(`There was an error: ${error.message || error}`);
+      hideAll();
+    });
+  }
+
+  skillsBtn.addEventListener('click', () => handleStreamClick('skills/stream', 'Writing suggestions...', showResponse));
+
+  function showGeneratedResume(data) {
+    responseContainer.style.display = 'block';
+    responseText.textContent = data.improved_resume;
+    progressContainer.style.display = 'none';
+    downloadContainer.style.display = 'block';
+    // The backend serves the PDF itself, so the browser downloads it directly.
+    downloadLink.href = `${backendUrl}${data.pdf_url}`;
+  }
+
+  // Generation runs as a backend job; its ID is kept so a reopened popup picks the job up again.
+  function watchJob(jobId) {
+    localStorage.setItem('rezupJob', jobId);
+    showProgress('Generating Improved Resume...', 5);
+    downloadContainer.style.display = 'none';
+    const source = new EventSource(`${backendUrl}/jobs/${jobId}/events`);
+
+    function finish() {
+      source.close();
+      localStorage.removeItem('rezupJob');
+    }
+
+    source.addEventListener('status', event => {
+      const progress = JSON.parse(event.data).progress;
+      const stages = Object.values(progress.stages || {});
+      const finished = stages.filter(stage => stage.status === 'done').length;
+      progressBarFill.style.width = `${stages.length ? 5 + 90 * finished / stages.length : 5}%`;
+      if (progress.preview) {
+        responseContainer.style.display = 'block';
+        responseText.textContent = progress.preview;
+      }
+    });
+    source.addEventListener('done', event => {
+      finish();
+      const data = JSON.parse(event.data);
+      rememberResume(data);
+      showGeneratedResume(data);
+    });
+    source.addEventListener('failed', event => {
+      finish();
+      alert(`Error: ${JSON.parse(event.data).error}`);
+      hideAll();
+    });
+    source.onerror = () => {
+      // EventSource reconnects on its own after network drops; a closed source means the job is gone.
+      if (source.readyState === EventSource.CLOSED) {
+        finish();
+        hideAll();
+      }
+    };
+  }
+
+  generateBtn.addEventListener('click', () => {
+    if (!jobDescriptionInput.value || !resumeFileInput.files[0]) {
+      alert('Please enter the job description and upload your resume.');
+      return;
+    }
+
+    showProgress('Queueing resume generation...', 2);
+    postForm('jobs')
     .then(response => response.json())
     .then(data => {
       if (data.error) {
-        alert(`Error: ${data.error}`);
-        progressContainer.style.display = 'none';
-        responseContainer.style.display = 'none';
-        downloadContainer.style.display = 'none';
-      } else {
-        responseContainer.style.display = 'block';
-        responseText.textContent = data.improved_resume;
-        progressContainer.style.display = 'none';
-        downloadContainer.style.display = 'block';
-        const pdfBase64 = data.pdf_base64;
-        downloadLink.href = 'data:application/pdf;base64,' + pdfBase64;
+        throw new Error(errorMessage(data));
       }
+      rememberResume(data);
+      watchJob(data.job_id);
     })
     .catch(error => {
-      alert(`There was an error: ${error}`);
-      progressContainer.style.display = 'none';
-      responseContainer.style.display = 'none';
-      downloadContainer.style.display = 'none';
+      alert(`There was an error: ${error.message || error}`);
+      hideAll();
     });
   });
+
+  const pendingJob = localStorage.getItem('rezupJob');
+  if (pendingJob) {
+    watchJob(pendingJob);
+  }
 });
@@ -1,233 +1,502 @@
-import google.generativeai as genai
-from PIL import Image
-import fitz
-import io
-import base64
+import json
 import os
-import re
+import sys
+import tempfile
+import time
+import zipfile
 from dotenv import load_dotenv
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS  # For handling cross-origin requests
+from werkzeug.exceptions import RequestEntityTooLarge
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))  # Shared rezup package
+from rezup.admission import Overloaded, get_model_gate
+from rezup.artifacts import UnknownArtifact, get_artifact_store
+from rezup.batch import batch_respond, get_batch_checkpoint, run_batch, save_uploads, zip_sources
+from rezup.cache import get_response_cache
+from rezup.client import configure_client
+from rezup.cpu_pool import CPUTaskError, get_cpu_pool
+from rezup.evaluation import evaluate_resume_progress, extract_score_from_evaluation
+from rezup.gemini import get_gemini_response, stream_gemini_response
+from rezup.generation import build_generate_pipeline, build_report_pipeline
+from rezup.job_analysis import UnknownJobDescription, get_job_analysis, get_job_analysis_store
+from rezup.jobs import InvalidJob, JobQueue, UnknownJob, get_job_store
+from rezup.keyword_match import local_match
+from rezup.pdf import create_pdf
+from rezup.planner import get_usage_ledger, prepare_resume_input
+from rezup.prompts import input_prompt1, input_prompt2, input_prompt4
+from rezup.resume_store import ResumeTooLarge, UnknownResume, get_resume_store
+from rezup.scheduler import get_scheduler
+from rezup.semantic import semantic_match
+from rezup.streaming import ChunkRelay, sse_event
+from rezup.structured import get_ats_report, missing_keyword_names
+from rezup.tracing import get_tracer, render_prometheus
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+configure_client(os.getenv("GOOGLE_API_KEY"))
 
 app = Flask(__name__)
+# Whole requests above this are refused with 413 before the body is read; batch uploads carry many resumes.
+app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("REZUP_MAX_REQUEST_BYTES", 64 * 1024 * 1024)) or None
 CORS(app) # Enable CORS for all routes
 
-def get_gemini_response(input_text, pdf_content, prompt):
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    if pdf_content:
-        response = model.generate_content([input_text, pdf_content[0], prompt])
-    else:
-        response = model.generate_content([input_text, prompt])
-    return response.text
+def event_stream(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
-def convert_pdf_to_text(uploaded_file):
-    text = ""
-    try:
-        pdf_document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-        for page_num in range(pdf_document.page_count):
-            page = pdf_document.load_page(page_num)
-            text += page.get_text()
-    except Exception as e:
-        print(f"Error converting PDF to text: {e}")
-    return [{"mime_type": "text/plain", "data": base64.b64encode(text.encode('utf-8')).decode('utf-8')}]
-
-def generate_improved_resume(input_text, pdf_content):
-    prompt = """Based on the job description and current resume, generate an improved resume that:
-    1. Incorporates all missing keywords and skills from the job description
-    2. Maintains the original structure but enhances content with quantifiable achievements
-    3. Optimizes for ATS systems with proper keyword placement
-    4. Presents information clearly and professionally
-    5. Uses active language and power verbs
-    6. Ensures consistent formatting throughout
-
-    Format the resume with these sections:
-    - Header (Name, Contact Info, LinkedIn)
-    - Professional Summary (tailored to the job)
-    - Technical Skills (categorized and matching job requirements)
-    - Work Experience (with quantified achievements using numbers/percentages)
-    - Education
-    - Certifications (if any)
-    - Projects (if relevant)
-
-    Make sure the content is concise, achievement-oriented, and perfectly tailored to the job description.
-    Include specific keywords from the job description naturally in context."""
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content([input_text, pdf_content[0], prompt])
-    return response.text
-
-def create_pdf(resume_text):
-    buffer = io.BytesIO()
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='RezUpHeader', fontName='Helvetica-Bold', fontSize=16, spaceAfter=12))
-    styles.add(ParagraphStyle(name='RezUpSubheader', fontName='Helvetica-Bold', fontSize=14, spaceAfter=8))
-    styles.add(ParagraphStyle(name='RezUpBody', fontSize=12, leading=14, spaceAfter=6))
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    for line in resume_text.split('\n'):
-        if not line.strip():
-            story.append(Spacer(1, 12))
-        elif line.startswith('## '):
-            story.append(Paragraph(line[3:], styles['RezUpHeader']))
-        elif line.startswith('### '):
-            story.append(Paragraph(line[4:], styles['RezUpSubheader']))
-        elif line.startswith('**') and line.endswith('**'):
-            story.append(Paragraph(line[2:-2], styles['Heading3']))
-        else:
-            story.append(Paragraph(line, styles['RezUpBody']))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer.getvalue()
-
-def extract_score_from_evaluation(evaluation_text):
-    match = re.search(r'(\d{1,3})%', evaluation_text)
-    return int(match.group(1)) if match else 0
-
-def extract_missing_keywords(evaluation_text):
-    lines = evaluation_text.split('\n')
-    keywords = []
-    in_section = False
-    for line in lines:
-        if "missing keywords" in line.lower():
-            in_section = True
-        elif in_section and line.strip().startswith('-'):
-            keywords.append(line.strip()[1:].strip())
-        elif in_section and not line.strip():
-            break
-    return keywords
-
-def evaluate_resume_progress(original_score, optimized_score, original_missing, optimized_missing):
-    improvement = optimized_score - original_score
-    recovered_keywords = set(original_missing) - set(optimized_missing)
+def prepare_resume(resume):
+    return prepare_resume_input(resume, get_resume_store())
+
+def load_resume():
+    # Clients that already uploaded a resume can send its resume_id instead of the file.
+    resume_id = request.form.get('resume_id')
+    if resume_id:
+        return get_resume_store().get(resume_id)
+    resume_file = request.files.get('resume')
+    if resume_file:
+        return get_resume_store().add_stream(resume_file.stream)
+    return None
+
+def load_job_description():
+    # Like resumes: a job description analysed once (POST /jd) can be referenced by its jd_id.
+    jd_id = request.form.get('jd_id')
+    if jd_id:
+        return get_job_analysis_store().get(jd_id).text
+    return request.form.get('job_description')
+
+def render_pdf_artifact(improved_resume):
+    # The PDF goes straight to the artifact store; responses carry its URL, not its bytes.
+    return get_artifact_store().put(create_pdf(improved_resume))
+
+def build_generate_payload(run, resume):
+    original_report = run.results["original_evaluation"]
+    improved_resume = run.results["improved_resume"]
+    improved_report = run.results["improved_evaluation"]
+    progress_data = evaluate_resume_progress(original_report["score"], improved_report["score"],
+                                                missing_keyword_names(original_report),
+                                                missing_keyword_names(improved_report))
     return {
-        "original_score": original_score,
-        "optimized_score": optimized_score,
-        "improvement": improvement,
-        "recovered_keywords": list(recovered_keywords),
-        "remaining_missing": list(set(optimized_missing))
+        "improved_resume": improved_resume,
+        "original_evaluation": original_report["text"],
+        "improved_evaluation": improved_report["text"],
+        "original_report": original_report,
+        "improved_report": improved_report,
+        "progress": progress_data,
+        "pdf_id": run.results["pdf"],
+        "pdf_url": f"/pdf/{run.results['pdf']}",
+        "stages": run.summary(),
+        "resume_id": resume.id
     }
 
-input_prompt1 = """As an experienced Technical HR Manager with expertise in data science, AI, and tech fields, review this resume against the job description.
-Provide a professional evaluation of alignment with the role, highlighting:
-1. Key strengths matching the job requirements
-2. Potential weaknesses or gaps
-3. Overall suitability for the position
-Include a percentage match score at the top (e.g., "Current match: 65%")."""
-
-input_prompt2 = """As a career development coach specializing in tech fields, analyze this resume and job description to:
-1. Identify skill gaps between the candidate and job requirements
-2. Recommend specific skills to develop
-3. Suggest learning resources or pathways
-4. Provide actionable improvement steps"""
-
-input_prompt3 = """As an ATS optimization expert, evaluate this resume for:
-1. Percentage match with the job description (show as % at top)
-2. List of present keywords from the job description (with frequency)
-3. List of missing keywords from the job description
-4. Formatting issues that might affect ATS parsing
-5. Final recommendations for improvement
-Format clearly with headings for each section and provide specific metrics.
-Example format:
-Current ATS Match: 65%
-
-Present Keywords:
-- Python (3 mentions)
-- Machine Learning (2 mentions)
-
-Missing Keywords:
-- TensorFlow
-- Data Pipelines
-
-Formatting Issues:
-- Missing section headers
-- Inconsistent bullet points
-
-Recommendations:
-1. Add missing keywords naturally in context
-2. Standardize formatting
-3. Quantify achievements"""
-
-input_prompt4 = """As an ATS specialist, identify:
-1. The most important missing keywords from the resume
-2. Which job requirements aren't addressed
-3. Suggested additions to improve ATS ranking
-Present in a bullet-point list with priority indicators (High/Medium/Low).
-Include a percentage score at the top (e.g., "Current ATS match: 65%")."""
+def overload_details(error):
+    if isinstance(error, Overloaded):
+        return {"code": "overloaded", "retry_after": error.retry_after}
+    return {}
 
-@app.route('/evaluate', methods=['POST'])
-def evaluate_resume():
+def raise_if_overloaded(run):
+    # A stage turned away by the model gate means the whole request should be retried later.
+    for error in run.errors.values():
+        if isinstance(error, Overloaded):
+            raise error
+
+def generate_failure(run):
+    failed = next(iter(run.errors), None)
+    return {"error": f"Resume generation failed at stage '{failed}': {run.errors.get(failed, 'cancelled')}",
+            "stages": run.summary(), **overload_details(run.errors.get(failed))}
+
+JOB_PREVIEW_INTERVAL = 0.5  # seconds between stored previews of the resume being written
+
+def run_generate_job(job, report):
+    # Job workers may live in another process, so the resume comes from the job row, not the request.
+    job_description = job["params"]["job_description"]
+    resume = get_resume_store().add(job["input"])
+    pdf_content = prepare_resume(resume).parts
+    chunks = []
+    last_preview = [0.0]
+
+    def on_chunk(text):
+        chunks.append(text)
+        now = time.monotonic()
+        if now - last_preview[0] >= JOB_PREVIEW_INTERVAL:
+            last_preview[0] = now
+            report(preview="".join(chunks))
+
+    pipeline = build_generate_pipeline(job_description, pdf_content, resume.text, on_chunk=on_chunk,
+                                       render=render_pdf_artifact)
+    run = pipeline.run(on_update=lambda run: report(stages=run.summary()))
+    if not run.ok:
+        raise_if_overloaded(run)
+        raise RuntimeError(generate_failure(run)["error"])
+    return build_generate_payload(run, resume)
+
+job_queue = JobQueue(get_job_store(), {"generate": run_generate_job},
+                     workers=int(os.getenv("REZUP_JOB_WORKERS", 2)))
+
+@app.errorhandler(Overloaded)
+def overloaded(error):
+    response = jsonify({"error": str(error), **overload_details(error)})
+    response.status_code = error.status
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+@app.errorhandler(UnknownJob)
+def unknown_job(error):
+    return jsonify({"error": str(error), "code": "unknown_job"}), 404
+
+@app.errorhandler(InvalidJob)
+def invalid_job(error):
+    return jsonify({"error": str(error), "code": "invalid_job"}), error.status
+
+@app.errorhandler(UnknownArtifact)
+def unknown_artifact(error):
+    return jsonify({"error": str(error), "code": "unknown_file"}), 404
+
+@app.errorhandler(CPUTaskError)
+def unprocessable_pdf(error):
+    return jsonify({"error": str(error), "code": "unprocessable_pdf"}), error.status
+
+@app.errorhandler(ResumeTooLarge)
+def resume_too_large(error):
+    return jsonify({"error": str(error), "code": "resume_too_large"}), error.status
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    limit = app.config["MAX_CONTENT_LENGTH"]
+    return jsonify({"error": f"Request is larger than the {limit // 1024} KB limit", "code": "request_too_large"}), 413
+
+@app.errorhandler(UnknownResume)
+def unknown_resume(error):
+    return jsonify({"error": str(error), "code": "unknown_resume"}), 404
+
+@app.errorhandler(UnknownJobDescription)
+def unknown_job_description(error):
+    return jsonify({"error": str(error), "code": "unknown_jd"}), 404
+
+@app.route('/jd', methods=['POST'])
+def analyze_job_description():
     job_description = request.form.get('job_description')
+    if not job_description:
+        return jsonify({"error": "Job description is required"}), 400
+    return jsonify(get_job_analysis(job_description).describe())
+
+@app.route('/jd/<jd_id>', methods=['GET'])
+def describe_job_description(jd_id):
+    return jsonify(get_job_analysis_store().get(jd_id).describe())
+
+@app.route('/resumes', methods=['POST'])
+def upload_resume():
     resume_file = request.files.get('resume')
-    if not job_description or not resume_file:
+    if not resume_file:
+        return jsonify({"error": "Resume is required"}), 400
+    return jsonify(get_resume_store().add_stream(resume_file.stream).describe())
+
+@app.route('/resumes/<resume_id>', methods=['GET'])
+def describe_resume(resume_id):
+    return jsonify(get_resume_store().get(resume_id).describe())
+
+@app.route('/pdf/<pdf_id>', methods=['GET'])
+def download_pdf(pdf_id):
+    # Streamed from disk; conditional=True answers If-None-Match with 304 and Range with 206.
+    response = send_file(get_artifact_store().open_path(pdf_id), mimetype='application/pdf', as_attachment=True,
+                         download_name='improved_resume.pdf', conditional=True, etag=pdf_id)
+    response.cache_control.private = True
+    return response
+
+@app.route('/match', methods=['POST'])
+def keyword_match():
+    # Instant, deterministic keyword match and requirement coverage; no model call.
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
         return jsonify({"error": "Job description and resume are required"}), 400
-    pdf_content = convert_pdf_to_text(resume_file)
+    job = get_job_analysis(job_description)
+    return jsonify(dict(job.index.score(resume.text), **semantic_match(job, resume.text), resume_id=resume.id,
+                        jd_id=job.id, seniority=job.seniority))
+
+@app.route('/evaluate', methods=['POST'])
+def evaluate_resume():
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
+        return jsonify({"error": "Job description and resume are required"}), 400
+    pdf_content = prepare_resume(resume).parts
     response = get_gemini_response(job_description, pdf_content, input_prompt1)
     score = extract_score_from_evaluation(response)
-    return jsonify({"evaluation": response, "score": score})
+    return jsonify({"evaluation": response, "score": score, "local_match": local_match(job_description, resume.text),
+                    "resume_id": resume.id})
 
 @app.route('/skills', methods=['POST'])
 def suggest_skills():
-    job_description = request.form.get('job_description')
-    resume_file = request.files.get('resume')
-    if not job_description or not resume_file:
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
         return jsonify({"error": "Job description and resume are required"}), 400
-    pdf_content = convert_pdf_to_text(resume_file)
+    pdf_content = prepare_resume(resume).parts
     response = get_gemini_response(job_description, pdf_content, input_prompt2)
-    return jsonify({"suggestions": response})
+    return jsonify({"suggestions": response, "resume_id": resume.id})
+
+@app.route('/skills/stream', methods=['POST'])
+def stream_skills():
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
+        return jsonify({"error": "Job description and resume are required"}), 400
+    pdf_content = prepare_resume(resume).parts
+
+    def events():
+        chunks = []
+        try:
+            for text in stream_gemini_response(job_description, pdf_content, input_prompt2):
+                chunks.append(text)
+                yield sse_event({"text": text}, "chunk")
+        except Exception as e:
+            yield sse_event({"error": str(e), **overload_details(e)}, "error")
+            return
+        yield sse_event({"suggestions": "".join(chunks), "resume_id": resume.id}, "done")
+    return event_stream(events())
 
 @app.route('/keywords', methods=['POST'])
 def find_missing_keywords():
-    job_description = request.form.get('job_description')
-    resume_file = request.files.get('resume')
-    if not job_description or not resume_file:
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
         return jsonify({"error": "Job description and resume are required"}), 400
-    pdf_content = convert_pdf_to_text(resume_file)
+    pdf_content = prepare_resume(resume).parts
     response = get_gemini_response(job_description, pdf_content, input_prompt4)
     score = extract_score_from_evaluation(response)
-    return jsonify({"keywords": response, "score": score})
+    return jsonify({"keywords": response, "score": score, "local_match": local_match(job_description, resume.text),
+                    "resume_id": resume.id})
 
 @app.route('/score', methods=['POST'])
 def get_ats_score():
-    job_description = request.form.get('job_description')
-    resume_file = request.files.get('resume')
-    if not job_description or not resume_file:
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
         return jsonify({"error": "Job description and resume are required"}), 400
-    pdf_content = convert_pdf_to_text(resume_file)
-    response = get_gemini_response(job_description, pdf_content, input_prompt3)
-    score = extract_score_from_evaluation(response)
-    return jsonify({"ats_report": response, "score": score})
+    pdf_content = prepare_resume(resume).parts
+    report = get_ats_report(job_description, pdf_content)
+    return jsonify({"ats_report": report["text"], "score": report["score"], "report": report,
+                    "local_match": local_match(job_description, resume.text), "resume_id": resume.id})
 
 @app.route('/generate', methods=['POST'])
 def generate_resume():
-    job_description = request.form.get('job_description')
-    resume_file = request.files.get('resume')
-    if not job_description or not resume_file:
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
         return jsonify({"error": "Job description and resume are required"}), 400
-    pdf_content = convert_pdf_to_text(resume_file)
-    original_evaluation = get_gemini_response(job_description, pdf_content, input_prompt3)
-    original_score = extract_score_from_evaluation(original_evaluation)
-    original_missing = extract_missing_keywords(original_evaluation)
-    improved_resume = generate_improved_resume(job_description, pdf_content)
-    improved_content = [{"mime_type": "text/plain", "data": base64.b64encode(improved_resume.encode()).decode('utf-8')}]
-    improved_evaluation = get_gemini_response(job_description, improved_content, input_prompt3)
-    improved_score = extract_score_from_evaluation(improved_evaluation)
-    improved_missing = extract_missing_keywords(improved_evaluation)
-    progress_data = evaluate_resume_progress(original_score, improved_score,
-                                                original_missing, improved_missing)
-    pdf_buffer = create_pdf(improved_resume)
-    pdf_base64 = base64.b64encode(pdf_buffer).decode('utf-8')
-    return jsonify({
-        "improved_resume": improved_resume,
-        "original_evaluation": original_evaluation,
-        "improved_evaluation": improved_evaluation,
-        "progress": progress_data,
-        "pdf_base64": pdf_base64
-    })
+    pdf_content = prepare_resume(resume).parts
+    pipeline = build_generate_pipeline(job_description, pdf_content, resume.text, render=render_pdf_artifact)
+    run = pipeline.run()
+    if not run.ok:
+        raise_if_overloaded(run)
+        return jsonify(generate_failure(run)), 502
+    return jsonify(build_generate_payload(run, resume))
+
+@app.route('/generate/stream', methods=['POST'])
+def stream_generated_resume():
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
+        return jsonify({"error": "Job description and resume are required"}), 400
+    pdf_content = prepare_resume(resume).parts
+    relay = ChunkRelay()
+    relay.start(build_generate_pipeline(job_description, pdf_content, resume.text, on_chunk=relay.put,
+                                        render=render_pdf_artifact))
+
+    def events():
+        for text in relay:
+            yield sse_event({"text": text}, "chunk")
+        if relay.error is not None:
+            yield sse_event({"error": str(relay.error), **overload_details(relay.error)}, "error")
+        elif not relay.run.ok:
+            yield sse_event(generate_failure(relay.run), "error")
+        else:
+            yield sse_event(build_generate_payload(relay.run, resume), "done")
+    return event_stream(events())
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    # Queues a resume generation and returns at once; poll /jobs/<id> or follow /jobs/<id>/events.
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
+        return jsonify({"error": "Job description and resume are required"}), 400
+    params = {"job_description": job_description, "callback_url": request.form.get('callback_url')}
+    job_id = job_queue.submit(request.form.get('kind', 'generate'), params, resume.data)
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/jobs/{job_id}",
+                    "events_url": f"/jobs/{job_id}/events", "resume_id": resume.id}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    return jsonify(job_queue.store.get(job_id))
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_queue.store.get(job_id)
+
+    def events():
+        current = job
+        last_update = None
+        while True:
+            if current["status"] == "done":
+                yield sse_event(current["result"], "done")
+                return
+            if current["status"] == "failed":
+                yield sse_event({"error": current["error"]}, "failed")
+                return
+            if current["updated"] != last_update:
+                last_update = current["updated"]
+                yield sse_event({"status": current["status"], "progress": current["progress"]}, "status")
+            time.sleep(0.5)
+            current = job_queue.store.get(job_id)
+    return event_stream(events())
+
+@app.route('/report', methods=['POST'])
+def full_report():
+    job_description = load_job_description()
+    resume = load_resume()
+    if not job_description or resume is None:
+        return jsonify({"error": "Job description and resume are required"}), 400
+    pdf_content = prepare_resume(resume).parts
+    run = build_report_pipeline(job_description, pdf_content).run()
+    if not run.results:
+        raise_if_overloaded(run)
+        return jsonify({"error": "Report generation failed", "stages": run.summary()}), 502
+    report = dict(run.results)
+    scores = {name: extract_score_from_evaluation(report[name]) for name in ("evaluation", "keywords") if name in report}
+    if "ats_report" in report:
+        structured = report["ats_report"]
+        report["ats_report"] = structured["text"]
+        report["ats_fields"] = structured
+        scores["ats_report"] = structured["score"]
+    report["scores"] = scores
+    report["score"] = scores.get("ats_report", 0)
+    report["errors"] = {name: str(error) for name, error in run.errors.items()}
+    report["stages"] = run.summary()
+    report["local_match"] = local_match(job_description, resume.text)
+    report["resume_id"] = resume.id
+    return jsonify(report)
+
+@app.route('/batch/score', methods=['POST'])
+def batch_score():
+    job_description = load_job_description()
+    uploads = request.files.getlist('resumes')
+    archive = request.files.get('archive')
+    if not job_description or not (uploads or archive):
+        return jsonify({"error": "Job description and at least one resume (or a zip archive) are required"}), 400
+    # Resumes whose local keyword match and requirement coverage both fall below this skip the model.
+    try:
+        min_local_score = int(request.form.get('min_local_score') or os.getenv("REZUP_BATCH_MIN_LOCAL_SCORE", 0))
+    except ValueError:
+        return jsonify({"error": "min_local_score must be a whole number"}), 400
+    workdir = tempfile.TemporaryDirectory(prefix="rezup-batch-")
+    sources = save_uploads(uploads, workdir.name)
+    if archive:
+        archive_path = os.path.join(workdir.name, "resumes.zip")
+        archive.save(archive_path)
+        try:
+            sources.extend(zip_sources(archive_path))
+        except zipfile.BadZipFile:
+            workdir.cleanup()
+            return jsonify({"error": "archive must be a zip file of PDF resumes"}), 400
+
+    def events():
+        try:
+            for event in run_batch(job_description, sources, batch_respond(get_gemini_response),
+                                   lambda resume: prepare_resume_input(resume).parts,
+                                   checkpoint=get_batch_checkpoint(),
+                                   concurrency=int(os.getenv("REZUP_BATCH_CONCURRENCY", 4)),
+                                   requests_per_minute=int(os.getenv("REZUP_BATCH_RPM", 60)),
+                                   min_local_score=min_local_score):
+                yield json.dumps(event) + "\n"
+        finally:
+            workdir.cleanup()
+    return Response(stream_with_context(events()), mimetype="application/x-ndjson")
+
+@app.route('/usage', methods=['GET'])
+def token_usage():
+    return jsonify(get_usage_ledger().summary())
+
+@app.route('/gate/stats', methods=['GET'])
+def gate_stats():
+    return jsonify(get_model_gate().stats())
+
+@app.route('/jobs/stats', methods=['GET'])
+def job_stats():
+    return jsonify(job_queue.store.counts())
+
+@app.route('/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    return jsonify(get_scheduler().stats())
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(get_response_cache().stats())
+
+def metric_families():
+    # Counters and gauges the traced operations don't cover, read from the shared components' stats.
+    usage = get_usage_ledger().summary()
+    cache = get_response_cache().stats()
+    gate = get_model_gate().stats()
+    scheduler = get_scheduler().stats()
+    cpu = get_cpu_pool().stats()
+    return [
+        ("rezup_model_calls_total", "counter", "Model calls that returned a response.", [({}, usage["calls"])]),
+        ("rezup_model_tokens_total", "counter", "Model tokens reported by the API.",
+         [({"kind": "input"}, usage["actual_tokens"]), ({"kind": "output"}, usage["output_tokens"])]),
+        ("rezup_response_cache_total", "counter", "Response cache lookups.",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("rezup_model_gate_in_flight", "gauge", "Model calls holding a gate slot.", [({}, gate["in_flight"])]),
+        ("rezup_model_gate_waiting", "gauge", "Requests queued for a gate slot.", [({}, gate["waiting"])]),
+        ("rezup_scheduler_retries_total", "counter", "Model calls retried after a retryable error.",
+         [({}, scheduler["retries"])]),
+        ("rezup_cpu_tasks_total", "counter", "PDF parsing, rasterizing and rendering tasks sent to the CPU pool.",
+         [({}, cpu["tasks"])]),
+        ("rezup_cpu_task_failures_total", "counter", "CPU pool tasks that raised, ran too long or crashed.",
+         [({"reason": "error"}, cpu["failures"]), ({"reason": "timeout"}, cpu["timeouts"]),
+          ({"reason": "crash"}, cpu["crashes"])]),
+        ("rezup_cpu_pool_restarts_total", "counter", "Times the CPU pool was rebuilt.", [({}, cpu["restarts"])]),
+        ("rezup_jobs", "gauge", "Background jobs by status.",
+         [({"status": status}, count) for status, count in sorted(job_queue.store.counts().items())]),
+    ]
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    # Prometheus scrape endpoint.
+    return Response(render_prometheus(get_tracer(), metric_families()), mimetype="text/plain; version=0.0.4")
+
+@app.route('/trace/recent', methods=['GET'])
+def recent_spans():
+    return jsonify(get_tracer().recent(request.args.get('limit', 50, type=int)))
+
+def create_asgi_app():
+    # For ASGI servers: uvicorn --factory extension_app:create_asgi_app --port 5000
+    # a2wsgi runs each request on its own thread pool, sized like waitress; asgiref's adapter would put
+    # every request through a single thread.
+    from a2wsgi import WSGIMiddleware
+    job_queue.start()
+    return WSGIMiddleware(app, workers=int(os.getenv("REZUP_SERVER_THREADS", 64)))
+
+def serve():
+    # REZUP_SERVER=waitress runs a production WSGI server. Its threads only wait on the network,
+    # and the model gate, not the thread count, decides how many model calls run at once.
+    server = os.getenv("REZUP_SERVER", "dev")
+    port = int(os.getenv("REZUP_PORT", 5000))
+    get_cpu_pool().warm_up()  # the first upload shouldn't pay for starting workers and importing PyMuPDF
+    # Job workers start with the server, so jobs queued before a restart resume without waiting for a request.
+    job_queue.start()
+    if server == "waitress":
+        from waitress import serve as waitress_serve
+        waitress_serve(app, host=os.getenv("REZUP_HOST", "127.0.0.1"), port=port,
+                       threads=int(os.getenv("REZUP_SERVER_THREADS", 64)))
+    elif server == "worker":
+        # Runs job workers only; start web processes with REZUP_JOB_WORKERS=0 to scale them separately.
+        job_queue.run_forever()
+    elif server == "uvicorn":
+        import uvicorn
+        uvicorn.run(create_asgi_app(), host=os.getenv("REZUP_HOST", "127.0.0.1"), port=port)
+    else:
+        app.run(debug=True, port=port) # Run the Flask app on port 5000
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000) # Run the Flask app on port 5000
+    serve()
@@ -1,109 +1,142 @@
+import hashlib
 import streamlit as st
-import google.generativeai as genai
-from PIL import Image
-import fitz
-import io
-import base64
 import os
-import re
 from dotenv import load_dotenv
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+from rezup.admission import Overloaded
+from rezup.client import configure_client, get_model
+from rezup.cpu_pool import CPUTaskError
+from rezup.evaluation import evaluate_resume_progress, extract_score_from_evaluation
+from rezup.gemini import get_gemini_response, stream_gemini_response
+from rezup.generation import build_generate_pipeline, build_report_pipeline
+from rezup.job_analysis import get_job_analysis, job_description_id
+from rezup.pdf import create_pdf
+from rezup.planner import get_usage_ledger, prepare_resume_input
+from rezup.prompts import input_prompt1, input_prompt2, input_prompt4
+from rezup.resume_store import ResumeTooLarge, get_resume_store
+from rezup.semantic import semantic_match
+from rezup.streaming import ChunkRelay
+from rezup.structured import get_ats_report, missing_keyword_names
+from rezup.tracing import get_tracer
 
 load_dotenv()
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-
-def get_gemini_response(input_text, pdf_content, prompt):
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content([input_text, pdf_content[0], prompt])
-    return response.text
-
-def convert_pdf_to_image(uploaded_file):
-    pdf_document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-    page = pdf_document.load_page(0)
-    pix = page.get_pixmap()
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    img_byte_arr = io.BytesIO()
-    img.save(img_byte_arr, format='JPEG')
-    img_byte_arr = img_byte_arr.getvalue()
-    pdf_parts = [{"mime_type": "image/jpeg", "data": base64.b64encode(img_byte_arr).decode()}]
-    return pdf_parts
-
-def generate_improved_resume(input_text, pdf_content):
-    prompt = """Based on the job description and current resume, generate an improved resume that:
-    1. Incorporates all missing keywords and skills from the job description
-    2. Maintains the original structure but enhances content with quantifiable achievements
-    3. Optimizes for ATS systems with proper keyword placement
-    4. Presents information clearly and professionally
-    5. Uses active language and power verbs
-    6. Ensures consistent formatting throughout
-
-    Format the resume with these sections:
-    - Header (Name, Contact Info, LinkedIn)
-    - Professional Summary (tailored to the job)
-    - Technical Skills (categorized and matching job requirements)
-    - Work Experience (with quantified achievements using numbers/percentages)
-    - Education
-    - Certifications (if any)
-    - Projects (if relevant)
-
-    Make sure the content is concise, achievement-oriented, and perfectly tailored to the job description.
-    Include specific keywords from the job description naturally in context."""
-    model = genai.GenerativeModel("gemini-1.5-flash")
-    response = model.generate_content([input_text, pdf_content[0], prompt])
-    return response.text
-
-def create_pdf(resume_text):
-    buffer = io.BytesIO()
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='RezUpHeader', fontName='Helvetica-Bold', fontSize=16, spaceAfter=12))
-    styles.add(ParagraphStyle(name='RezUpSubheader', fontName='Helvetica-Bold', fontSize=14, spaceAfter=8))
-    styles.add(ParagraphStyle(name='RezUpBody', fontSize=12, leading=14, spaceAfter=6))
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    story = []
-    for line in resume_text.split('\n'):
-        if not line.strip():
-            story.append(Spacer(1, 12))
-        elif line.startswith('## '):
-            story.append(Paragraph(line[3:], styles['RezUpHeader']))
-        elif line.startswith('### '):
-            story.append(Paragraph(line[4:], styles['RezUpSubheader']))
-        elif line.startswith('**') and line.endswith('**'):
-            story.append(Paragraph(line[2:-2], styles['Heading3']))
-        else:
-            story.append(Paragraph(line, styles['RezUpBody']))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def extract_score_from_evaluation(evaluation_text):
-    match = re.search(r'(\d{1,3})%', evaluation_text)
-    return int(match.group(1)) if match else 0
-
-def extract_missing_keywords(evaluation_text):
-    lines = evaluation_text.split('\n')
-    keywords = []
-    in_section = False
-    for line in lines:
-        if "missing keywords" in line.lower():
-            in_section = True
-        elif in_section and line.strip().startswith('-'):
-            keywords.append(line.strip()[1:].strip())
-        elif in_section and not line.strip():
-            break
-    return keywords
-
-def evaluate_resume_progress(original_score, optimized_score, original_missing, optimized_missing):
-    improvement = optimized_score - original_score
-    recovered_keywords = set(original_missing) - set(optimized_missing)
-    return {
-        "original_score": original_score,
-        "optimized_score": optimized_score,
-        "improvement": improvement,
-        "recovered_keywords": list(recovered_keywords),
-        "remaining_missing": list(set(optimized_missing))
-    }
+
+# Prompt behind each of the four analysis buttons; the ATS score uses the structured report instead.
+ANALYSIS_PROMPTS = {"eval": input_prompt1, "skills": input_prompt2, "keywords": input_prompt4, "score": None}
+# Report pipeline stage -> the analysis button it answers for.
+REPORT_STAGES = {"evaluation": "eval", "suggestions": "skills", "keywords": "keywords", "ats_report": "score"}
+
+@st.cache_resource(show_spinner=False)
+def model_client(api_key, transport):
+    # Configured once per process, not on every rerun; transport is part of the key so changing it reconfigures.
+    configure_client(api_key)
+    return get_model()
+
+def connect_model():
+    # Only called before a model request, so pages that never reach one skip importing the SDK.
+    return model_client(os.getenv("GOOGLE_API_KEY"), os.getenv("REZUP_TRANSPORT"))
+
+def show_unreadable_pdf():
+    st.error("📄 This PDF could not be read. Please export it again or upload a different file.")
+    st.stop()
+
+def add_resume(uploaded_file):
+    # Reruns look the upload up by its file_id instead of hashing the same bytes again.
+    store = get_resume_store()
+    file_id = getattr(uploaded_file, "file_id", None)
+    resume_ids = st.session_state.setdefault("resume_ids", {}) if file_id else {}
+    resume = store.get(resume_ids[file_id], required=False) if file_id in resume_ids else None
+    if resume is not None:
+        return resume
+    try:
+        resume = store.add(uploaded_file.getvalue())
+    except ResumeTooLarge as error:
+        st.error(f"📄 {error}. Please upload a shorter resume.")
+        st.stop()
+    except CPUTaskError:
+        show_unreadable_pdf()
+    if file_id:
+        resume_ids[file_id] = resume.id
+    return resume
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def resume_parts(resume_id, _resume):
+    # Keyed by the resume's content hash only; the leading underscore keeps the resume object out of the key.
+    return prepare_resume_input(_resume, get_resume_store()).parts
+
+def prepare_resume(uploaded_file):
+    resume = add_resume(uploaded_file)
+    try:
+        return resume_parts(resume.id, resume)
+    except CPUTaskError:
+        show_unreadable_pdf()
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_resume_pdf(resume_text):
+    # The same improved resume is laid out once, however often the page reruns or the download is clicked.
+    return create_pdf(resume_text).getvalue()
+
+def sync_inputs(resume_id, input_text):
+    # Results belong to one (resume, job description) pair; a new upload or an edited JD drops them all.
+    inputs = (resume_id, job_description_id(input_text or ""))
+    if st.session_state.get("inputs") != inputs:
+        st.session_state.inputs = inputs
+        st.session_state.results = {}
+        st.session_state.view = None
+        st.session_state.generated = False
+
+def clear_results():
+    # Explicit reset: this session's results plus the shared parts and PDF caches.
+    st.session_state.results = {}
+    st.session_state.resume_ids = {}
+    st.session_state.view = None
+    st.session_state.generated = False
+    resume_parts.clear()
+    render_resume_pdf.clear()
+
+def result_key(name, prompt=None):
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest() if prompt else None
+    return (*st.session_state.inputs, name, digest)
+
+def cached_result(name, compute, spinner, prompt=None):
+    # Computed on the first request for this resume, JD and prompt; later reruns show the stored result.
+    key = result_key(name, prompt)
+    results = st.session_state.results
+    if key not in results:
+        with st.spinner(spinner):
+            connect_model()
+            results[key] = compute()
+    return results[key]
+
+def show_model_busy(error):
+    # Quota errors that outlast the scheduler's retries end the run with a message, not a stack trace.
+    st.error(f"⏳ Gemini is busy right now. Please try again in {error.retry_after} seconds.")
+    st.stop()
+
+def ask_gemini(input_text, pdf_content, prompt):
+    try:
+        return get_gemini_response(input_text, pdf_content, prompt)
+    except Overloaded as error:
+        show_model_busy(error)
+
+def get_report(input_text, pdf_content):
+    try:
+        return get_ats_report(input_text, pdf_content)
+    except Overloaded as error:
+        show_model_busy(error)
+
+def show_score(label, score):
+    st.markdown(f"""
+    <div class="progress-bar">
+        <div class="progress-fill" style="width: {score}%"></div>
+    </div>
+    <p style="text-align: center; font-weight: bold;">{label}: {score}%</p>
+    """, unsafe_allow_html=True)
+
+def instant_match(input_text, uploaded_file):
+    # Local keyword match from the resume's text layer; no model call.
+    job = get_job_analysis(input_text)
+    text = add_resume(uploaded_file).text
+    return job, dict(job.index.score(text), **semantic_match(job, text))
 
 st.set_page_config(page_title="RezUp - Resume Optimizer", layout="wide", page_icon="logo.png")
 
@@ -341,9 +374,27 @@ with st.container():
                                         placeholder="Paste the job description you're applying for...")
     uploaded_file = st.file_uploader("📂 Upload Your Resume (PDF only)", type="pdf", key="file")
     st.markdown('</div>', unsafe_allow_html=True)
+    sync_inputs(add_resume(uploaded_file).id if uploaded_file is not None else None, input_text)
 
     if uploaded_file is not None:
         st.markdown('<p class="success-message">✅ Resume uploaded successfully!</p>', unsafe_allow_html=True)
+        if input_text:
+            job, match = instant_match(input_text, uploaded_file)
+            with st.expander(f"⚡ Instant Keyword Match: {match['score']}%"):
+                st.caption("Computed locally from the resume text; use the analyses below for the full AI review.")
+                seniority = job.seniority
+                if seniority['level'] or seniority['min_years']:
+                    st.markdown("**Seniority:** " + " ".join(filter(None, [
+                        (seniority['level'] or "").title(),
+                        f"({seniority['min_years']}+ years)" if seniority['min_years'] else None])))
+                st.markdown("**Required skills:** " + (", ".join(skill['skill'] for skill in job.skills
+                                                                if skill['required']) or "none"))
+                st.markdown("**Present:** " + (", ".join(f"{item['keyword']} ×{item['count']}"
+                                                          for item in match['present_keywords']) or "none"))
+                st.markdown("**Missing:** " + (", ".join(item['keyword'] for item in match['missing_keywords']) or "none"))
+                st.markdown(f"**Requirement coverage:** {match['semantic_score']}%")
+                for item in match['missing_requirements']:
+                    st.markdown(f"- {item['requirement']}" + ("" if item['required'] else " *(nice to have)*"))
 
 st.markdown('<div class="action-buttons">', unsafe_allow_html=True)
 col1, col2, col3, col4 = st.columns(4)
@@ -357,164 +408,186 @@ with col4:
     submit_4 = st.button("📊 ATS Score", key="score")
 st.markdown('</div>', unsafe_allow_html=True)
 
+report_clicked = st.button("🧾 Full Report (all four analyses)", key="report")
+
 st.markdown('<div class="generate-btn-container">', unsafe_allow_html=True)
 generate_clicked = st.button("✨ Generate Improved Resume", key="generate")
 st.markdown('</div>', unsafe_allow_html=True)
 
-input_prompt1 = """As an experienced Technical HR Manager with expertise in data science, AI, and tech fields, review this resume against the job description.
-Provide a professional evaluation of alignment with the role, highlighting:
-1. Key strengths matching the job requirements
-2. Potential weaknesses or gaps
-3. Overall suitability for the position
-Include a percentage match score at the top (e.g., "Current match: 65%")."""
-
-input_prompt2 = """As a career development coach specializing in tech fields, analyze this resume and job description to:
-1. Identify skill gaps between the candidate and job requirements
-2. Recommend specific skills to develop
-3. Suggest learning resources or pathways
-4. Provide actionable improvement steps"""
-
-input_prompt3 = """As an ATS optimization expert, evaluate this resume for:
-1. Percentage match with the job description (show as % at top)
-2. List of present keywords from the job description (with frequency)
-3. List of missing keywords from the job description
-4. Formatting issues that might affect ATS parsing
-5. Final recommendations for improvement
-Format clearly with headings for each section and provide specific metrics.
-Example format:
-Current ATS Match: 65%
-
-Present Keywords:
-- Python (3 mentions)
-- Machine Learning (2 mentions)
-
-Missing Keywords:
-- TensorFlow
-- Data Pipelines
-
-Formatting Issues:
-- Missing section headers
-- Inconsistent bullet points
-
-Recommendations:
-1. Add missing keywords naturally in context
-2. Standardize formatting
-3. Quantify achievements"""
-
-input_prompt4 = """As an ATS specialist, identify:
-1. The most important missing keywords from the resume
-2. Which job requirements aren't addressed
-3. Suggested additions to improve ATS ranking
-Present in a bullet-point list with priority indicators (High/Medium/Low).
-Include a percentage score at the top (e.g., "Current ATS match: 65%")."""
-
-if submit_1:
-    if uploaded_file is not None:
-        with st.spinner("🔍 Analyzing your resume..."):
-            pdf_content = convert_pdf_to_image(uploaded_file)
-            response = get_gemini_response(input_text, pdf_content, input_prompt1)
-            st.markdown('<h2 class="sub-header">🔍 Professional Evaluation</h2>', unsafe_allow_html=True)
-            score = extract_score_from_evaluation(response)
-            st.markdown(f"""
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: {score}%"></div>
-            </div>
-            <p style="text-align: center; font-weight: bold;">Current Match: {score}%</p>
-            """, unsafe_allow_html=True)
-            st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
-    else:
-        st.warning("Please upload your resume to get analysis")
-
-elif submit_2:
-    if uploaded_file is not None:
-        with st.spinner("💡 Generating improvement suggestions..."):
-            pdf_content = convert_pdf_to_image(uploaded_file)
-            response = get_gemini_response(input_text, pdf_content, input_prompt2)
-            st.markdown('<h2 class="sub-header">💡 Skillset Development Plan</h2>', unsafe_allow_html=True)
-            st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
-    else:
-        st.warning("Please upload your resume to get suggestions")
-
-elif submit_3:
-    if uploaded_file is not None:
-        with st.spinner("🔍 Scanning for missing keywords..."):
-            pdf_content = convert_pdf_to_image(uploaded_file)
-            response = get_gemini_response(input_text, pdf_content, input_prompt4)
-            st.markdown('<h2 class="sub-header">🔑 Critical Missing Keywords</h2>', unsafe_allow_html=True)
-            score = extract_score_from_evaluation(response)
-            st.markdown(f"""
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: {score}%"></div>
-            </div>
-            <p style="text-align: center; font-weight: bold;">Current ATS Match: {score}%</p>
-            """, unsafe_allow_html=True)
-            st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
-    else:
-        st.warning("Please upload your resume to check keywords")
-
-elif submit_4:
-    if uploaded_file is not None:
-        with st.spinner("📊 Calculating ATS score..."):
-            pdf_content = convert_pdf_to_image(uploaded_file)
-            response = get_gemini_response(input_text, pdf_content, input_prompt3)
-            st.markdown('<h2 class="sub-header">📊 ATS Compatibility Report</h2>', unsafe_allow_html=True)
-            score = extract_score_from_evaluation(response)
-            st.markdown(f"""
-            <div class="progress-bar">
-                <div class="progress-fill" style="width: {score}%"></div>
-            </div>
-            <p style="text-align: center; font-weight: bold;">Current ATS Score: {score}%</p>
-            """, unsafe_allow_html=True)
-            st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
-    else:
-        st.warning("Please upload your resume to get ATS score")
+if uploaded_file is not None and st.button("🗑️ Clear cached results", key="clear"):
+    clear_results()
+    st.rerun()
+
+# A button picks the analysis on show; it stays on show across reruns until another is picked.
+for clicked, view, warning in [
+    (submit_1, "eval", "Please upload your resume to get analysis"),
+    (submit_2, "skills", "Please upload your resume to get suggestions"),
+    (submit_3, "keywords", "Please upload your resume to check keywords"),
+    (submit_4, "score", "Please upload your resume to get ATS score"),
+    (report_clicked, "report", "Please upload your resume to get the full report"),
+]:
+    if clicked:
+        if uploaded_file is not None:
+            st.session_state.view = view
+        else:
+            st.warning(warning)
+
+view = st.session_state.view if uploaded_file is not None else None
+
+if view == "eval":
+    response = cached_result("eval", lambda: ask_gemini(input_text, prepare_resume(uploaded_file), input_prompt1),
+                             "🔍 Analyzing your resume...", input_prompt1)
+    st.markdown('<h2 class="sub-header">🔍 Professional Evaluation</h2>', unsafe_allow_html=True)
+    show_score("Current Match", extract_score_from_evaluation(response))
+    st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
+
+elif view == "skills":
+    key = result_key("skills", input_prompt2)
+    st.markdown('<h2 class="sub-header">💡 Skillset Development Plan</h2>', unsafe_allow_html=True)
+    with st.container(border=True):
+        if key in st.session_state.results:
+            st.markdown(st.session_state.results[key])
+        else:
+            # Streamed the first time; the full text is kept for later reruns.
+            with st.spinner("💡 Generating improvement suggestions..."):
+                connect_model()
+                pdf_content = prepare_resume(uploaded_file)
+                try:
+                    st.session_state.results[key] = st.write_stream(
+                        stream_gemini_response(input_text, pdf_content, input_prompt2))
+                except Overloaded as error:
+                    show_model_busy(error)
+
+elif view == "keywords":
+    response = cached_result("keywords", lambda: ask_gemini(input_text, prepare_resume(uploaded_file), input_prompt4),
+                             "🔍 Scanning for missing keywords...", input_prompt4)
+    st.markdown('<h2 class="sub-header">🔑 Critical Missing Keywords</h2>', unsafe_allow_html=True)
+    show_score("Current ATS Match", extract_score_from_evaluation(response))
+    st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
+
+elif view == "score":
+    report = cached_result("score", lambda: get_report(input_text, prepare_resume(uploaded_file)),
+                           "📊 Calculating ATS score...")
+    st.markdown('<h2 class="sub-header">📊 ATS Compatibility Report</h2>', unsafe_allow_html=True)
+    show_score("Current ATS Score", report["score"])
+    st.markdown(f'<div class="response-container">{report["text"]}</div>', unsafe_allow_html=True)
+
+elif view == "report":
+    run = cached_result("report", lambda: build_report_pipeline(input_text, prepare_resume(uploaded_file)).run(),
+                        "🧾 Running all four analyses...")
+    # Each finished stage also answers its own button, so switching to a single analysis is instant.
+    for name, analysis in REPORT_STAGES.items():
+        if name in run.results:
+            st.session_state.results.setdefault(result_key(analysis, ANALYSIS_PROMPTS[analysis]), run.results[name])
+    sections = [
+        ("evaluation", "🔍 Professional Evaluation", "Current Match"),
+        ("suggestions", "💡 Skillset Development Plan", None),
+        ("keywords", "🔑 Critical Missing Keywords", "Current ATS Match"),
+        ("ats_report", "📊 ATS Compatibility Report", "Current ATS Score"),
+    ]
+    for name, title, score_label in sections:
+        st.markdown(f'<h2 class="sub-header">{title}</h2>', unsafe_allow_html=True)
+        if name not in run.results:
+            st.error(f"This analysis failed: {run.errors.get(name, 'cancelled')}")
+            continue
+        response = run.results[name]
+        if name == "ats_report":
+            show_score(score_label, response["score"])
+            response = response["text"]
+        elif score_label:
+            show_score(score_label, extract_score_from_evaluation(response))
+        st.markdown(f'<div class="response-container">{response}</div>', unsafe_allow_html=True)
 
 if generate_clicked:
     if uploaded_file is not None and input_text:
-        with st.spinner("✨ Creating your optimized resume..."):
-            pdf_content = convert_pdf_to_image(uploaded_file)
-            original_evaluation = get_gemini_response(input_text, pdf_content, input_prompt3)
-            original_score = extract_score_from_evaluation(original_evaluation)
-            original_missing = extract_missing_keywords(original_evaluation)
-            improved_resume = generate_improved_resume(input_text, pdf_content)
-            improved_content = [{"mime_type": "text/plain", "data": base64.b64encode(improved_resume.encode()).decode()}]
-            improved_evaluation = get_gemini_response(input_text, improved_content, input_prompt3)
-            improved_score = extract_score_from_evaluation(improved_evaluation)
-            improved_missing = extract_missing_keywords(improved_evaluation)
-            progress_data = evaluate_resume_progress(original_score, improved_score,
-                                                  original_missing, improved_missing)
-            st.markdown('<h2 class="sub-header">✨ Optimization Results</h2>', unsafe_allow_html=True)
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.info(f"Original Score: {progress_data['original_score']}%")
-            with col2:
-                st.success(f"Optimized Score: {progress_data['optimized_score']}%")
-            with col3:
-                st.info(f"Improvement: +{progress_data['improvement']}%")
-            if progress_data['recovered_keywords']:
-                st.success(f"Recovered keywords: {', '.join(progress_data['recovered_keywords'])}")
-            if progress_data['remaining_missing']:
-                st.warning(f"Still missing: {', '.join(progress_data['remaining_missing'])}")
-            with st.expander("📝 Original Resume Evaluation"):
-                st.markdown(f'<div class="response-container">{original_evaluation}</div>', unsafe_allow_html=True)
-            with st.expander("🆕 Optimized Resume"):
-                st.markdown(f'<div class="response-container">{improved_resume}</div>', unsafe_allow_html=True)
-            with st.expander("🔍 Optimized Resume Evaluation"):
-                st.markdown(f'<div class="response-container">{improved_evaluation}</div>', unsafe_allow_html=True)
-            try:
-                pdf_buffer = create_pdf(improved_resume)
-                st.download_button(
-                    label="📄 Download Improved Resume (PDF)",
-                    data=pdf_buffer,
-                    file_name="improved_resume.pdf",
-                    mime="application/pdf",
-                    key="download-resume",
-                    type="primary",
-                    use_container_width=True
-                )
-            except Exception as e:
-                st.error(f"Error generating PDF: {str(e)}")
+        st.session_state.generated = True
     elif not input_text:
         st.warning("Please enter a job description to optimize your resume")
     else:
         st.warning("Please upload your resume to generate an improved version")
+
+if st.session_state.generated and uploaded_file is not None and input_text:
+    # Kept after the first run, so clicking the download button or another analysis doesn't discard it.
+    key = result_key("generate")
+    if key not in st.session_state.results:
+        with st.spinner("✨ Creating your optimized resume..."):
+            connect_model()
+            resume = add_resume(uploaded_file)
+            pdf_content = prepare_resume(uploaded_file)
+            relay = ChunkRelay()
+            relay.start(build_generate_pipeline(input_text, pdf_content, resume.text, on_chunk=relay.put,
+                                                render=render_resume_pdf))
+            live_preview = st.empty()
+            with live_preview.container(border=True):
+                st.write_stream(relay)
+            live_preview.empty()
+            if relay.error is not None:
+                raise relay.error
+            st.session_state.results[key] = relay.run
+    run = st.session_state.results[key]
+    model_stages = ("original_evaluation", "improved_resume", "improved_evaluation")
+    failed = [name for name in model_stages if run.status[name] != "done"]
+    if failed:
+        st.error(f"Resume generation failed at stage '{failed[0]}': {run.errors.get(failed[0], 'cancelled')}")
+    else:
+        original_report = run.results["original_evaluation"]
+        improved_resume = run.results["improved_resume"]
+        improved_report = run.results["improved_evaluation"]
+        original_evaluation = original_report["text"]
+        improved_evaluation = improved_report["text"]
+        progress_data = evaluate_resume_progress(original_report["score"], improved_report["score"],
+                                              missing_keyword_names(original_report),
+                                              missing_keyword_names(improved_report))
+        st.markdown('<h2 class="sub-header">✨ Optimization Results</h2>', unsafe_allow_html=True)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.info(f"Original Score: {progress_data['original_score']}%")
+        with col2:
+            label = "Estimated Optimized Score" if improved_report.get("estimated") else "Optimized Score"
+            st.success(f"{label}: {progress_data['optimized_score']}%")
+        with col3:
+            st.info(f"Improvement: +{progress_data['improvement']}%")
+        if progress_data['recovered_keywords']:
+            st.success(f"Recovered keywords: {', '.join(progress_data['recovered_keywords'])}")
+        if progress_data['remaining_missing']:
+            st.warning(f"Still missing: {', '.join(progress_data['remaining_missing'])}")
+        with st.expander("📝 Original Resume Evaluation"):
+            st.markdown(f'<div class="response-container">{original_evaluation}</div>', unsafe_allow_html=True)
+        with st.expander("🆕 Optimized Resume"):
+            st.markdown(f'<div class="response-container">{improved_resume}</div>', unsafe_allow_html=True)
+        with st.expander("🔍 Optimized Resume Evaluation"):
+            st.markdown(f'<div class="response-container">{improved_evaluation}</div>', unsafe_allow_html=True)
+        with st.expander("⏱️ Stage Timings"):
+            st.json(run.summary())
+        if "pdf" in run.results:
+            st.download_button(
+                label="📄 Download Improved Resume (PDF)",
+                data=run.results["pdf"],
+                file_name="improved_resume.pdf",
+                mime="application/pdf",
+                key="download-resume",
+                type="primary",
+                use_container_width=True
+            )
+        else:
+            st.error(f"Error generating PDF: {str(run.errors.get('pdf'))}")
+
+last_usage = get_usage_ledger().last()
+if last_usage:
+    with st.expander("🧮 Token Usage"):
+        st.caption(f"Last call sent the resume as {last_usage['mode']}: "
+                   f"estimated {last_usage['estimated_tokens']} input tokens, actual {last_usage['actual_tokens']}.")
+        st.json(get_usage_ledger().summary(), expanded=False)
+
+if os.getenv("REZUP_DEBUG_PANEL") == "1" or st.query_params.get("debug") == "1":
+    # Where the time went in this process: PDF extraction, model calls, parsing and rendering.
+    with st.expander("🐞 Debug: Traced Operations"):
+        summary = get_tracer().summary()
+        if summary:
+            st.dataframe(summary, hide_index=True)
+        else:
+            st.caption("Nothing traced yet.")
+        st.json(get_tracer().recent(20), expanded=False)
+        if st.button("Reset traces"):
+            get_tracer().reset()
+            st.rerun()
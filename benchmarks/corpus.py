@@ -0,0 +1,58 @@
+import random
+
+SKILLS = ["Python", "Go", "Java", "SQL", "AWS", "GCP", "Docker", "Kubernetes", "Terraform", "CI/CD", "React",
+          "PostgreSQL", "Redis", "Kafka", "Spark", "Airflow", "Machine Learning", "REST APIs", "gRPC", "Linux"]
+VERBS = ["Built", "Led", "Designed", "Migrated", "Automated", "Scaled", "Cut", "Shipped", "Owned", "Improved"]
+OBJECTS = ["a billing service", "the data pipeline", "CI pipelines", "an internal API gateway", "search ranking",
+           "the mobile backend", "observability tooling", "a feature store", "the auth platform", "ETL jobs"]
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+We are looking for an engineer with 5+ years of experience building Python and Go services on AWS.
+You will own services running on Kubernetes, manage infrastructure with Terraform and improve our CI/CD.
+Experience with PostgreSQL, Redis, Kafka and REST APIs is required; machine learning exposure is a plus."""
+
+# (name, pages, scanned): scanned resumes have no text layer, so they take the page-image path.
+PROFILES = [("one_page", 1, False), ("two_page", 2, False), ("four_page", 4, False), ("eight_page", 8, False),
+            ("scanned_one_page", 1, True)]
+
+
+def resume_lines(rng, pages):
+    lines = [f"Candidate {rng.randrange(10_000):04d}", "candidate@example.com | github.com/candidate", "",
+             "SUMMARY", f"Engineer with {rng.randint(2, 15)} years of experience in "
+             + ", ".join(rng.sample(SKILLS, 4)) + ".", "", "SKILLS", ", ".join(rng.sample(SKILLS, 10)), "",
+             "EXPERIENCE"]
+    for _ in range(pages * 9):
+        lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} with {rng.choice(SKILLS)}, "
+                     f"improving throughput by {rng.randint(5, 80)}%")
+    return lines
+
+
+def make_resume(pages, scanned=False, seed=0):
+    # A deterministic PDF: same (pages, scanned, seed) -> same text and layout.
+    import fitz
+
+    rng = random.Random(f"{seed}:{pages}:{scanned}")
+    lines = resume_lines(rng, pages)
+    per_page = -(-len(lines) // pages)
+    document = fitz.open()
+    for index in range(pages):
+        page = document.new_page()
+        page.insert_textbox(page.rect + (54, 54, -54, -54), "\n".join(lines[index * per_page:(index + 1) * per_page]),
+                            fontsize=10)
+    if scanned:
+        # Rasterize every page and keep only the pictures, like a scanner would.
+        image_document = fitz.open()
+        for page in document:
+            pixmap = page.get_pixmap(dpi=100, colorspace=fitz.csGRAY)
+            image_page = image_document.new_page(width=page.rect.width, height=page.rect.height)
+            image_page.insert_image(image_page.rect, pixmap=pixmap)
+        document = image_document
+    data = document.tobytes(garbage=3, deflate=True)
+    document.close()
+    return data
+
+
+def build_corpus(seed=0, profiles=PROFILES):
+    return [{"name": name, "pages": pages, "scanned": scanned, "data": make_resume(pages, scanned, seed)}
+            for name, pages, scanned in profiles]
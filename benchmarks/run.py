@@ -0,0 +1,346 @@
+import argparse
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.corpus import JOB_DESCRIPTION, build_corpus  # noqa: E402
+
+# Flask endpoints that take a job description and one resume, by report name.
+FORM_ENDPOINTS = [
+    ("match", "/match"),
+    ("evaluate", "/evaluate"),
+    ("skills", "/skills"),
+    ("skills_stream", "/skills/stream"),
+    ("keywords", "/keywords"),
+    ("score", "/score"),
+    ("report", "/report"),
+    ("generate", "/generate"),
+    ("generate_stream", "/generate/stream"),
+]
+STATS_ENDPOINTS = ["/usage", "/gate/stats", "/jobs/stats", "/scheduler/stats", "/cache/stats"]
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile; values must be sorted.
+    if not values:
+        return None
+    return values[max(0, math.ceil(pct / 100 * len(values)) - 1)]
+
+
+def summarize(latencies, wall, errors=0):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(1000 * percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(1000 * percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(1000 * percentile(latencies, 99), 2) if latencies else None,
+        "requests_per_second": round(len(latencies) / wall, 2) if wall else None,
+    }
+
+
+def summarize_stages(stage_runs):
+    # stage_runs: Pipeline.summary() dicts; returns per-stage latency percentiles.
+    seconds = {}
+    for summary in stage_runs:
+        for name, stage in summary.items():
+            if stage["status"] == "done":
+                seconds.setdefault(name, []).append(stage["seconds"])
+    stages = {}
+    for name, values in seconds.items():
+        values.sort()
+        stages[name] = {"runs": len(values), "p50_ms": round(1000 * percentile(values, 50), 2),
+                        "p95_ms": round(1000 * percentile(values, 95), 2),
+                        "p99_ms": round(1000 * percentile(values, 99), 2)}
+    return stages
+
+
+def measure(call, count, concurrency):
+    # call(index) -> optional Pipeline.summary(); raises or returns False on failure.
+    latencies = []
+    stage_runs = []
+    errors = [0]
+
+    def one(index):
+        started = time.perf_counter()
+        try:
+            outcome = call(index)
+        except Exception as e:
+            print(f"  request {index} failed: {e}", file=sys.stderr)
+            outcome = False
+        elapsed = time.perf_counter() - started
+        if outcome is False:
+            errors[0] += 1
+        else:
+            latencies.append(elapsed)
+            if isinstance(outcome, dict):
+                stage_runs.append(outcome)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(count)))
+    result = summarize(latencies, time.perf_counter() - started, errors[0])
+    if stage_runs:
+        result["stages"] = summarize_stages(stage_runs)
+    return result
+
+
+def timed(func):
+    # For calls whose return value is not a stage summary.
+    def call(index):
+        func(index)
+    return call
+
+
+class Workload:
+    def __init__(self, corpus, reuse_prompts):
+        self.corpus = corpus
+        self.reuse_prompts = reuse_prompts
+        self._references = itertools.count()
+
+    def resume(self, index):
+        return self.corpus[index % len(self.corpus)]
+
+    def job_description(self, index):
+        # A job description never sent before keeps the response cache and call coalescing out of the numbers.
+        if self.reuse_prompts:
+            return JOB_DESCRIPTION
+        return f"{JOB_DESCRIPTION}\nReference: bench-{next(self._references)}"
+
+
+def bench_components(workload, repeat):
+    from rezup.fake_model import FAKE_REPORT, FAKE_RESUME
+    from rezup.incremental import incremental_evaluation
+    from rezup.job_analysis import get_job_analysis
+    from rezup.keyword_match import local_match
+    from rezup.pdf import create_pdf
+    from rezup.render import RenderOptions, render_pages
+    from rezup.resume_store import extract_pdf
+    from rezup.semantic import EmbeddingIndex, semantic_match, split_resume
+    from rezup.structured import parse_ats_report
+
+    options = RenderOptions.from_env()
+    report_json = json.dumps(FAKE_REPORT)
+    report = parse_ats_report(report_json)
+    job = get_job_analysis(JOB_DESCRIPTION)
+    results = {}
+    for resume in workload.corpus:
+        text = extract_pdf(resume["data"])[0]
+        calls = {
+            "convert_pdf_to_text": lambda: extract_pdf(resume["data"]),
+            "convert_pdf_to_image": lambda: render_pages(resume["data"], options),
+            "local_match": lambda: local_match(JOB_DESCRIPTION, text),
+            "embed_resume": lambda: EmbeddingIndex(split_resume(text)),
+            "semantic_match": lambda: semantic_match(job, text),  # resume vectors cached after the first call
+        }
+        for name, call in calls.items():
+            results[f"{name}[{resume['name']}]"] = measure(timed(lambda index: call()), repeat, 1)
+    results["parse_ats_report"] = measure(timed(lambda index: parse_ats_report(report_json)), repeat, 1)
+    original_text = extract_pdf(workload.corpus[0]["data"])[0]
+    results["incremental_evaluation"] = measure(
+        timed(lambda index: incremental_evaluation(report, original_text, FAKE_RESUME)), repeat, 1)
+    results["create_pdf"] = measure(timed(lambda index: create_pdf(FAKE_RESUME)), repeat, 1)
+    return results
+
+
+def bench_flask(workload, requests, concurrency):
+    sys.path.insert(0, os.path.join(ROOT, "RezUp_ChromeExtension"))
+    import extension_app
+
+    app = extension_app.app
+    results = {}
+
+    def post(path, index):
+        resume = workload.resume(index)
+        data = {"job_description": workload.job_description(index),
+                "resume": (io.BytesIO(resume["data"]), f"{resume['name']}.pdf")}
+        response = app.test_client().post(path, data=data)
+        body = response.get_data()  # drains streamed responses too
+        if response.status_code != 200:
+            return False
+        if response.mimetype == "application/json":
+            return json.loads(body).get("stages")
+        return None
+
+    for name, path in FORM_ENDPOINTS:
+        results[name] = measure(lambda index, path=path: post(path, index), requests, concurrency)
+
+    def upload(index):
+        data = {"resume": (io.BytesIO(workload.resume(index)["data"]), "resume.pdf")}
+        return app.test_client().post("/resumes", data=data).status_code == 200 or False
+    results["resumes"] = measure(upload, requests, concurrency)
+
+    pdf_url = json.loads(app.test_client().post("/generate", data={
+        "job_description": workload.job_description(0),
+        "resume": (io.BytesIO(workload.resume(0)["data"]), "resume.pdf")}).get_data())["pdf_url"]
+    results["pdf"] = measure(lambda index: app.test_client().get(pdf_url).status_code == 200 or False,
+                             requests, concurrency)
+
+    def job(index):
+        # Submission to completion, as the popup sees it.
+        resume = workload.resume(index)
+        client = app.test_client()
+        submitted = json.loads(client.post("/jobs", data={
+            "job_description": workload.job_description(index),
+            "resume": (io.BytesIO(resume["data"]), "resume.pdf")}).get_data())
+        while True:
+            status = json.loads(client.get(submitted["status_url"]).get_data())
+            if status["status"] in ("done", "failed"):
+                return status["result"]["stages"] if status["status"] == "done" else False
+            time.sleep(0.01)
+    results["jobs"] = measure(job, requests, concurrency)
+
+    def batch(index):
+        files = [(io.BytesIO(resume["data"]), f"{resume['name']}.pdf") for resume in workload.corpus]
+        response = app.test_client().post("/batch/score", data={
+            "job_description": workload.job_description(index), "resumes": files})
+        return b'"ranking"' in response.get_data() or False
+    results["batch_score"] = measure(batch, max(1, requests // len(workload.corpus)), 1)
+
+    for path in STATS_ENDPOINTS:
+        results[path.strip("/").replace("/", "_")] = measure(
+            lambda index, path=path: app.test_client().get(path).status_code == 200 or False, requests, concurrency)
+    return results
+
+
+def bench_streamlit(workload, requests, concurrency):
+    # Importing app.py outside `streamlit run` executes the page in bare mode: widgets return their
+    # defaults, so only the module-level helpers do real work.
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+
+    def parts(resume):
+        return app.prepare_resume(io.BytesIO(resume["data"]))
+
+    def generate(index):
+        resume = workload.resume(index)
+        text = app.get_resume_store().add(resume["data"]).text
+        run = app.build_generate_pipeline(workload.job_description(index), parts(resume), text).run()
+        return run.summary() if run.ok else False
+
+    def report(index):
+        run = app.build_report_pipeline(workload.job_description(index), parts(workload.resume(index))).run()
+        return run.summary() if run.results else False
+
+    return {
+        "prepare_resume": measure(timed(lambda index: parts(workload.resume(index))), requests, concurrency),
+        "instant_match": measure(timed(lambda index: app.instant_match(
+            workload.job_description(index), io.BytesIO(workload.resume(index)["data"]))), requests, concurrency),
+        "generate_pipeline": measure(generate, requests, concurrency),
+        "report_pipeline": measure(report, requests, concurrency),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(baseline, current):
+    # Prints p50/p95 and throughput changes for every entry both runs measured.
+    for section in ("components", "flask", "streamlit"):
+        for name, now in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before or not before.get("p50_ms") or not now.get("p50_ms"):
+                continue
+            changes = []
+            for key in ("p50_ms", "p95_ms", "requests_per_second"):
+                if before.get(key) and now.get(key):
+                    changes.append(f"{key} {before[key]} -> {now[key]} ({100 * (now[key] / before[key] - 1):+.1f}%)")
+            print(f"{section}/{name}: " + ", ".join(changes))
+
+
+def print_table(results):
+    for section in ("components", "flask", "streamlit"):
+        if section not in results:
+            continue
+        print(f"\n{section}")
+        for name, result in results[section].items():
+            print(f"  {name:<40} p50 {result['p50_ms']!s:>9} ms  p95 {result['p95_ms']!s:>9} ms  "
+                  f"p99 {result['p99_ms']!s:>9} ms  {result['requests_per_second']!s:>8} req/s  "
+                  f"errors {result['errors']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark RezUp against a local stub model and synthetic resumes.")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per endpoint or pipeline")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions per component measurement")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub model latency per call, in seconds")
+    parser.add_argument("--response-size", type=int, default=0, help="Pad stub model replies to this many characters")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the corpus and the stub model")
+    parser.add_argument("--reuse-prompts", action="store_true",
+                        help="Send the same job description every time, so caches and coalescing apply")
+    parser.add_argument("--only", choices=["components", "flask", "streamlit"], action="append",
+                        help="Run only these sections (repeatable)")
+    parser.add_argument("--output", default="benchmark.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="rezup-bench-")
+    # Set before the apps are imported, since they read their configuration at import time.
+    os.environ.update({
+        "REZUP_FAKE_MODEL": "1",
+        "REZUP_FAKE_LATENCY": str(args.latency),
+        "REZUP_FAKE_RESPONSE_SIZE": str(args.response_size),
+        "REZUP_FAKE_SEED": str(args.seed),
+        "REZUP_CACHE_PATH": "",
+        "REZUP_JOB_DB": os.path.join(workdir, "jobs.sqlite"),
+        "REZUP_ARTIFACT_DIR": os.path.join(workdir, "artifacts"),
+        "REZUP_BATCH_CHECKPOINT": os.path.join(workdir, "batch.sqlite"),
+    })
+    workload = Workload(build_corpus(args.seed), args.reuse_prompts)
+    sections = args.only or ["components", "flask", "streamlit"]
+    results = {
+        "meta": {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "settings": vars(args),
+            "corpus": [{key: resume[key] for key in ("name", "pages", "scanned")} | {"bytes": len(resume["data"])}
+                       for resume in workload.corpus],
+        },
+    }
+    if "components" in sections:
+        results["components"] = bench_components(workload, args.repeat)
+    if "flask" in sections:
+        results["flask"] = bench_flask(workload, args.requests, args.concurrency)
+    if "streamlit" in sections:
+        results["streamlit"] = bench_streamlit(workload, args.requests, args.concurrency)
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+    print_table(results)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            print()
+            compare(json.load(handle), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
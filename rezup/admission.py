@@ -0,0 +1,90 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(RuntimeError):
+    def __init__(self, message, retry_after, status=503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+class ModelGate:
+    def __init__(self, max_in_flight=8, max_queue=32, queue_timeout=30.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._average_seconds = 5.0
+        self._counts = {"admitted": 0, "rejected": 0, "timed_out": 0}
+
+    def _retry_after(self):
+        # Rough wait until a newcomer at the back of the queue would get a slot.
+        rounds = (self._waiting + 1) / self.max_in_flight
+        return max(1, math.ceil(self._average_seconds * rounds))
+
+    def acquire(self):
+        with self._condition:
+            if self._in_flight >= self.max_in_flight and self._waiting >= self.max_queue:
+                self._counts["rejected"] += 1
+                raise Overloaded("Too many requests are waiting for the model", self._retry_after(), 429)
+            deadline = time.monotonic() + self.queue_timeout
+            self._waiting += 1
+            try:
+                while self._in_flight >= self.max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._counts["timed_out"] += 1
+                        raise Overloaded("Timed out waiting for a free model slot", self._retry_after(), 503)
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+            self._counts["admitted"] += 1
+        return time.monotonic()
+
+    def release(self, started):
+        with self._condition:
+            self._in_flight -= 1
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * (time.monotonic() - started)
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        started = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "average_seconds": round(self._average_seconds, 3),
+                **self._counts,
+            }
+
+
+_shared_gate = None
+_shared_lock = threading.Lock()
+
+
+def get_model_gate():
+    global _shared_gate
+    with _shared_lock:
+        if _shared_gate is None:
+            _shared_gate = ModelGate(
+                max_in_flight=int(os.getenv("REZUP_MAX_IN_FLIGHT", 8)),
+                max_queue=int(os.getenv("REZUP_MAX_QUEUE", 32)),
+                queue_timeout=float(os.getenv("REZUP_QUEUE_TIMEOUT", 30)),
+            )
+        return _shared_gate
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+
+ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UnknownArtifact(LookupError):
+    def __init__(self, artifact_id):
+        super().__init__(f"Unknown or expired file '{artifact_id}'; generate it again")
+        self.artifact_id = artifact_id
+
+
+class ArtifactStore:
+    # Generated files on disk, named by their SHA-256. The name doubles as the ETag, and files are
+    # shared with job workers running in other processes.
+    def __init__(self, path, ttl=60 * 60, purge_interval=5 * 60):
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def put(self, data, suffix=".pdf"):
+        # data: bytes or a BytesIO; BytesIO contents are hashed and written in place, without a copy.
+        view = data.getbuffer() if hasattr(data, "getbuffer") else memoryview(data)
+        try:
+            artifact_id = hashlib.sha256(view).hexdigest()
+            target = os.path.join(self.path, artifact_id + suffix)
+            if os.path.exists(target):
+                os.utime(target)
+            else:
+                handle, temp_path = tempfile.mkstemp(dir=self.path, suffix=".part")
+                with os.fdopen(handle, "wb") as temp_file:
+                    temp_file.write(view)
+                os.replace(temp_path, target)
+        finally:
+            view.release()
+        self._maybe_purge()
+        return artifact_id
+
+    def open_path(self, artifact_id, suffix=".pdf"):
+        if not ID_PATTERN.match(artifact_id):
+            raise UnknownArtifact(artifact_id)
+        target = os.path.join(self.path, artifact_id + suffix)
+        try:
+            modified = os.path.getmtime(target)
+        except OSError:
+            raise UnknownArtifact(artifact_id) from None
+        if self.ttl is not None and time.time() - modified > self.ttl:
+            raise UnknownArtifact(artifact_id)
+        return target
+
+    def _maybe_purge(self):
+        now = time.time()
+        with self._lock:
+            if self.ttl is None or now - self._last_purge < self.purge_interval:
+                return
+            self._last_purge = now
+        for entry in os.scandir(self.path):
+            try:
+                if now - entry.stat().st_mtime > self.ttl:
+                    os.remove(entry.path)
+            except OSError:
+                pass  # Another process got there first.
+
+    def __len__(self):
+        return sum(1 for entry in os.scandir(self.path) if not entry.name.endswith(".part"))
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_artifact_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            path = os.getenv("REZUP_ARTIFACT_DIR") or os.path.join(tempfile.gettempdir(), "rezup_artifacts")
+            _shared_store = ArtifactStore(path, ttl=float(os.getenv("REZUP_ARTIFACT_TTL", 60 * 60)) or None)
+        return _shared_store
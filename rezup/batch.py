@@ -0,0 +1,330 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from rezup.cpu_pool import CPUPool, CPUTaskError, get_cpu_pool
+from rezup.job_analysis import get_job_analysis
+from rezup.ratelimit import TokenBucket
+from rezup.scheduler import BATCH
+from rezup.semantic import semantic_match
+from rezup.structured import ats_prompt, get_ats_report, missing_keyword_names
+from rezup.resume_store import ParsedResume, ResumeTooLarge, extract_pdf, get_resume_store
+
+WINDOW_SIZE = 32
+
+
+def upload_limit():
+    # Batch resumes get the same per-file limit as single uploads (REZUP_MAX_UPLOAD_BYTES).
+    return get_resume_store().max_upload_bytes
+
+
+def _check_size(size, limit):
+    if limit is not None and size > limit:
+        raise ResumeTooLarge(f"Resume is larger than the {limit // 1024} KB limit")
+
+
+def directory_sources(path):
+    limit = upload_limit()
+    for root, _, files in sorted(os.walk(path)):
+        for name in sorted(files):
+            if name.lower().endswith(".pdf"):
+                full_path = os.path.join(root, name)
+                yield os.path.relpath(full_path, path), lambda full_path=full_path: _read_file(full_path, limit)
+
+
+def _read_member(bundle, info, limit):
+    # Checked against the declared size before inflating, and the read is capped in case the header lies.
+    _check_size(info.file_size, limit)
+    with bundle.open(info) as member:
+        data = member.read() if limit is None else member.read(limit + 1)
+    _check_size(len(data), limit)
+    return data
+
+
+def zip_sources(archive):
+    # archive may be a path or a file-like object; it stays open while the loaders are in use.
+    bundle = zipfile.ZipFile(archive)
+    limit = upload_limit()
+    return [(info.filename, lambda info=info: _read_member(bundle, info, limit))
+            for info in bundle.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(".pdf")]
+
+
+def save_uploads(uploads, directory):
+    # Request files are closed once the view returns, so a streamed batch works from copies on disk.
+    limit = upload_limit()
+    sources = []
+    for index, upload in enumerate(uploads):
+        path = os.path.join(directory, f"{index}.pdf")
+        upload.save(path)
+        sources.append((upload.filename or f"{index}.pdf", lambda path=path: _read_file(path, limit)))
+    return sources
+
+
+def path_sources(path):
+    if os.path.isdir(path):
+        return directory_sources(path)
+    if zipfile.is_zipfile(path):
+        return zip_sources(path)
+    raise ValueError(f"{path} is neither a directory nor a zip archive of PDFs")
+
+
+def _read_file(path, limit=None):
+    _check_size(os.path.getsize(path), limit)
+    with open(path, "rb") as handle:
+        return handle.read()
+
+
+def job_key(job_description, prompt=None):
+    # Hashes the prompt actually sent, so text and JSON output modes keep separate checkpoints.
+    prompt = ats_prompt() if prompt is None else prompt
+    return hashlib.sha256(f"{prompt}\0{job_description}".encode("utf-8")).hexdigest()
+
+
+class BatchCheckpoint:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS batch_results ("
+            "job_key TEXT NOT NULL, resume_id TEXT NOT NULL, name TEXT NOT NULL, score INTEGER NOT NULL, "
+            "missing_keywords TEXT NOT NULL, report TEXT NOT NULL, finished REAL NOT NULL, "
+            "PRIMARY KEY (job_key, resume_id))"
+        )
+        self._conn.commit()
+
+    def load(self, key):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT resume_id, name, score, missing_keywords FROM batch_results WHERE job_key = ?", (key,)
+            ).fetchall()
+        return {
+            resume_id: {"name": name, "resume_id": resume_id, "score": score, "local_score": None,
+                        "semantic_score": None, "missing_keywords": json.loads(missing), "error": None}
+            for resume_id, name, score, missing in rows
+        }
+
+    def record(self, key, result, report):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO batch_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, result["resume_id"], result["name"], result["score"],
+                 json.dumps(result["missing_keywords"]), report, time.time()),
+            )
+            self._conn.commit()
+
+
+_shared_checkpoint = None
+_shared_lock = threading.Lock()
+
+
+def get_batch_checkpoint():
+    global _shared_checkpoint
+    with _shared_lock:
+        if _shared_checkpoint is None:
+            path = os.getenv("REZUP_BATCH_CHECKPOINT") or os.path.join(tempfile.gettempdir(), "rezup_batch.sqlite")
+            _shared_checkpoint = BatchCheckpoint(path)
+        return _shared_checkpoint
+
+
+def batch_respond(respond):
+    # Turns a model call into a batch-lane ATS report; batch calls wait behind interactive ones.
+    return lambda job_description, parts: get_ats_report(job_description, parts, respond, priority=BATCH)
+
+
+def rank_results(results):
+    # Model-scored resumes first, then those skipped by the local pre-filter, then failures.
+    return sorted(results, key=lambda result: (result["error"] is not None, bool(result.get("skipped")),
+                                               -(result["score"] or result.get("local_score") or 0),
+                                               result["name"]))
+
+
+def _windows(items, size):
+    window = []
+    for item in items:
+        window.append(item)
+        if len(window) == size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def run_batch(job_description, sources, respond, prepare, checkpoint=None, concurrency=4,
+              requests_per_minute=60, extract_workers=None, min_local_score=0):
+    # Yields progress/result events as they happen and a final ranking event.
+    # respond(job_description, parts) returns a parsed ATS report; see batch_respond.
+    key = job_key(job_description)
+    job = get_job_analysis(job_description)
+    index = job.index
+    done = checkpoint.load(key) if checkpoint else {}
+    limiter = TokenBucket.per_minute(requests_per_minute, burst=concurrency)
+    results = {}
+    pending = []
+    for name, load in sources:
+        try:
+            data = load()
+        except ResumeTooLarge as e:
+            # Never read, so there is no resume_id; the result is keyed by name instead.
+            results[("too_large", name)] = {"name": name, "resume_id": None, "score": None, "local_score": None,
+                                            "semantic_score": None, "missing_keywords": [], "error": str(e)}
+            continue
+        resume_id = hashlib.sha256(data).hexdigest()
+        if resume_id in results:
+            continue
+        if resume_id in done:
+            results[resume_id] = dict(done[resume_id], name=name, resumed=True)
+        else:
+            results[resume_id] = None
+            # Only the loader is kept; the bytes are read again when the resume's window comes up.
+            pending.append((name, resume_id, load))
+    total = len(results)
+    finished = total - len(pending)
+    yield {"event": "progress", "done": finished, "total": total, "resumed": finished}
+    for result in results.values():
+        if result is not None:
+            yield {"event": "result", **result}
+
+    def score(name, resume_id, data, extracted):
+        result = {"name": name, "resume_id": resume_id, "score": None, "local_score": None,
+                  "semantic_score": None, "missing_keywords": [], "error": None}
+        try:
+            if isinstance(extracted, Exception):
+                raise extracted
+            text, pages, metadata = extracted
+            if text.strip():
+                match = index.score(text)
+                result["local_score"] = match["score"]
+                # Requirement coverage catches resumes that phrase the skills differently from the JD.
+                coverage = semantic_match(job, text)
+                result["semantic_score"] = coverage["semantic_score"]
+                # Scanned resumes have no text to match, so they always go to the model.
+                if max(match["score"], coverage["semantic_score"]) < min_local_score:
+                    result["skipped"] = True
+                    result["missing_keywords"] = [item["keyword"] for item in match["missing_keywords"]]
+                    result["missing_requirements"] = [item["requirement"]
+                                                      for item in coverage["missing_requirements"]]
+                    return result
+            parts = prepare(ParsedResume(resume_id, data, text, pages, metadata))
+            limiter.acquire()
+            report = respond(job_description, parts)
+            result["score"] = report["score"]
+            result["missing_keywords"] = missing_keyword_names(report)
+            if checkpoint:
+                checkpoint.record(key, result, report["text"])
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    # Extraction goes through a CPU pool, so a PDF that hangs or crashes its worker only fails its own result.
+    shared_pool = get_cpu_pool()
+    cpu_pool = shared_pool if extract_workers is None else CPUPool(extract_workers, timeout=shared_pool.timeout)
+
+    max_pages = get_resume_store().max_pages
+
+    def extract(data):
+        try:
+            return extract_pdf(data, max_pages, pool=cpu_pool)
+        except (CPUTaskError, ResumeTooLarge) as e:
+            return e
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, cpu_pool.workers)) as extract_pool, \
+                ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="rezup-batch") as model_pool:
+            windows = _windows(pending, WINDOW_SIZE)
+
+            def start_window():
+                window = next(windows, None)
+                if window is None:
+                    return None, None
+                datas = [load() for _, _, load in window]
+                return [(name, resume_id, data) for (name, resume_id, _), data in zip(window, datas)], \
+                    extract_pool.map(extract, datas)
+
+            current, extracting = start_window()
+            while current:
+                extracted = list(extracting)
+                # Parse the next window while this one waits on the model.
+                upcoming, extracting = start_window()
+                futures = [model_pool.submit(score, name, resume_id, data, parsed)
+                           for (name, resume_id, data), parsed in zip(current, extracted)]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result["resume_id"]] = result
+                    finished += 1
+                    yield {"event": "result", **result}
+                    yield {"event": "progress", "done": finished, "total": total}
+                current = upcoming
+    finally:
+        if cpu_pool is not shared_pool:
+            cpu_pool.close()
+    yield {"event": "ranking", "results": rank_results(list(results.values()))}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank a folder or zip of PDF resumes against one job description.")
+    parser.add_argument("job_description", help="Path to a text file with the job description")
+    parser.add_argument("resumes", help="Directory or zip archive of PDF resumes")
+    parser.add_argument("--checkpoint", default="rezup_batch.sqlite",
+                        help="SQLite file that records finished resumes so an interrupted run can resume")
+    parser.add_argument("--output", help="Write the final ranking as JSON to this file")
+    parser.add_argument("--concurrency", type=int, default=4, help="Model calls in flight at once")
+    parser.add_argument("--rpm", type=int, default=60, help="Model requests per minute")
+    parser.add_argument("--extract-workers", type=int, default=None, help="Processes used for PDF extraction")
+    parser.add_argument("--min-local-score", type=int, default=0,
+                        help="Skip the model for resumes whose local keyword match and requirement coverage "
+                             "are both below this percentage")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    from rezup.client import configure_client
+    from rezup.gemini import get_gemini_response
+    from rezup.planner import prepare_resume_input
+
+    load_dotenv()
+    configure_client(os.getenv("GOOGLE_API_KEY"))
+    with open(args.job_description, encoding="utf-8") as handle:
+        job_description = handle.read()
+
+    ranking = []
+    events = run_batch(job_description, path_sources(args.resumes), batch_respond(get_gemini_response),
+                       lambda resume: prepare_resume_input(resume).parts,
+                       checkpoint=BatchCheckpoint(args.checkpoint), concurrency=args.concurrency,
+                       requests_per_minute=args.rpm, extract_workers=args.extract_workers,
+                       min_local_score=args.min_local_score)
+    for event in events:
+        if event["event"] == "progress":
+            print(f"\r{event['done']}/{event['total']} resumes scored", end="", file=sys.stderr, flush=True)
+        elif event["event"] == "result" and event["error"]:
+            print(f"\n{event['name']}: {event['error']}", file=sys.stderr)
+        elif event["event"] == "ranking":
+            ranking = event["results"]
+    print(file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(ranking, handle, indent=2)
+    for position, result in enumerate(ranking, start=1):
+        if result["error"]:
+            score = "error"
+        elif result.get("skipped"):
+            score = f"~{result['local_score']}%"
+        else:
+            score = f"{result['score']}%"
+        print(f"{position:>4}. {score:>6}  {result['name']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(model_name, prompt, input_text, pdf_content):
+    digest = hashlib.sha256()
+
+    def feed(value):
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        digest.update(len(value).to_bytes(8, "big"))
+        digest.update(value)
+
+    feed(model_name)
+    feed(prompt)
+    feed(input_text or "")
+    for part in pdf_content or []:
+        if isinstance(part, dict):
+            feed(part.get("mime_type", ""))
+            feed(part.get("data", b""))
+        else:
+            feed(str(part))
+    return digest.hexdigest()
+
+
+class MemoryTier:
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteTier:
+    def __init__(self, path, ttl=None, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl is not None and now - created > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+class ResponseCache:
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "sets": 0}
+        self._tier_hits = [0] * len(self.tiers)
+
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                # Promote into the faster tiers so the next lookup stops early.
+                for faster in self.tiers[:index]:
+                    faster.set(key, value)
+                with self._lock:
+                    self._counters["hits"] += 1
+                    self._tier_hits[index] += 1
+                return value
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, key, value):
+        for tier in self.tiers:
+            tier.set(key, value)
+        with self._lock:
+            self._counters["sets"] += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value:
+                self.set(key, value)
+        return value
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            stats["tiers"] = {
+                type(tier).__name__: hits for tier, hits in zip(self.tiers, self._tier_hits)
+            }
+        return stats
+
+
+def _env_number(name, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def build_cache_from_env():
+    ttl = _env_number("REZUP_CACHE_TTL", 24 * 60 * 60, float) or None
+    tiers = [MemoryTier(max_entries=_env_number("REZUP_CACHE_SIZE", 256), ttl=ttl)]
+    disk_path = os.getenv("REZUP_CACHE_PATH")
+    if disk_path:
+        tiers.append(SQLiteTier(disk_path, ttl=ttl,
+                                max_bytes=_env_number("REZUP_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+    return ResponseCache(tiers)
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = build_cache_from_env()
+        return _shared_cache
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+
+class ModelConfig:
+    def __init__(self, model_name=DEFAULT_MODEL, timeout=None, temperature=None, top_p=None,
+                 top_k=None, max_output_tokens=None, response_schema=None):
+        self.model_name = model_name
+        self.timeout = timeout
+        self.temperature = temperature
+        self.top_p = top_p
+        self.top_k = top_k
+        self.max_output_tokens = max_output_tokens
+        self.response_schema = response_schema
+
+    @classmethod
+    def from_env(cls, **overrides):
+        options = {
+            "model_name": os.getenv("REZUP_MODEL") or DEFAULT_MODEL,
+            "timeout": _env_number("REZUP_MODEL_TIMEOUT", float),
+            "temperature": _env_number("REZUP_TEMPERATURE", float),
+            "top_p": _env_number("REZUP_TOP_P", float),
+            "top_k": _env_number("REZUP_TOP_K", int),
+            "max_output_tokens": _env_number("REZUP_MAX_OUTPUT_TOKENS", int),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def generation_config(self):
+        # Unset parameters are left out so the model's own defaults apply.
+        config = {"temperature": self.temperature, "top_p": self.top_p, "top_k": self.top_k,
+                  "max_output_tokens": self.max_output_tokens}
+        if self.response_schema is not None:
+            # JSON mode: the model is constrained to replies matching the schema.
+            config.update(response_mime_type="application/json", response_schema=self.response_schema)
+        return {name: value for name, value in config.items() if value is not None}
+
+    def request_options(self):
+        return {"timeout": self.timeout} if self.timeout else {}
+
+    def cache_name(self):
+        # Feeds the response cache key; default settings keep the plain model name.
+        generation = self.generation_config()
+        return f"{self.model_name}:{json.dumps(generation, sort_keys=True)}" if generation else self.model_name
+
+    def key(self):
+        return (self.model_name, json.dumps(self.generation_config(), sort_keys=True))
+
+
+def _env_number(name, kind):
+    value = os.getenv(name)
+    return kind(value) if value not in (None, "") else None
+
+
+_models = {}
+_models_lock = threading.Lock()
+_configured = None
+_applied = None
+
+
+def configure_client(api_key=None):
+    # REZUP_TRANSPORT picks "grpc" (one multiplexed HTTP/2 channel) or "rest" (a keep-alive session).
+    # Only the settings are recorded here: importing google.generativeai takes about a second, so it
+    # waits for the first real model call instead of every cold start.
+    global _configured
+    settings = (api_key, os.getenv("REZUP_TRANSPORT") or None)
+    with _models_lock:
+        # Streamlit reruns call this on every interaction; reconfiguring would drop the open connection.
+        if settings == _configured:
+            return
+        # New settings replace the underlying service client, so models bound to the old one are dropped.
+        _models.clear()
+        _configured = settings
+
+
+def _genai():
+    # Called with _models_lock held.
+    global _applied
+    import google.generativeai as genai
+
+    if _configured is not None and _configured != _applied:
+        genai.configure(api_key=_configured[0], transport=_configured[1])
+        _applied = _configured
+    return genai
+
+
+def get_model(config=None):
+    # One GenerativeModel per configuration; each keeps its service client, and with it the open
+    # connection, for the life of the process.
+    config = config or ModelConfig.from_env()
+    key = config.key()
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            if os.getenv("REZUP_FAKE_MODEL") == "1":
+                # Local stub for tests and load runs; see rezup/fake_model.py.
+                from rezup.fake_model import fake_model_from_env
+                model = fake_model_from_env(config.model_name, config.generation_config())
+            else:
+                model = _genai().GenerativeModel(config.model_name,
+                                                 generation_config=config.generation_config() or None)
+            _models[key] = model
+        return model
@@ -0,0 +1,204 @@
+import importlib
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+# Imported by each worker as it starts, so the first real task doesn't pay for them.
+WARM_MODULES = ["fitz", "reportlab.platypus"]
+
+
+class CPUTaskError(RuntimeError):
+    # The input (usually a malformed PDF) failed, hung or crashed its worker; the server itself is fine.
+    status = 422
+
+
+class TaskFailed(CPUTaskError):
+    pass
+
+
+class TaskTimeout(CPUTaskError):
+    pass
+
+
+class WorkerCrashed(CPUTaskError):
+    pass
+
+
+def _start_worker(pids, warm):
+    # Runs once in each new worker, before its first task. The pid lets the pool stop a hung worker.
+    pids.put(os.getpid())
+    if not warm:
+        return
+    for name in WARM_MODULES:
+        importlib.import_module(name)
+    from rezup.pdf import get_pdf_styles
+
+    get_pdf_styles()
+
+
+def _ready(_):
+    return os.getpid()
+
+
+def in_worker():
+    return multiprocessing.parent_process() is not None
+
+
+def _failed(name, error):
+    # Exceptions raised by the task itself, e.g. PyMuPDF rejecting a malformed PDF, are the input's fault.
+    if isinstance(error, CPUTaskError):
+        return error
+    failure = TaskFailed(f"{name} failed: {error}")
+    failure.__cause__ = error
+    return failure
+
+
+class _Workers:
+    # A process pool plus the pids of its workers, which is what stopping a running task needs.
+    def __init__(self, workers, warm=True):
+        self.pids = multiprocessing.SimpleQueue()
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=(self.pids, warm))
+        self.stopped = False
+
+    def submit(self, func, *args):
+        return self.executor.submit(func, *args)
+
+    def stop(self):
+        # The executor has no public way to stop a running task, so its workers are terminated directly.
+        self.stopped = True
+        while not self.pids.empty():
+            try:
+                os.kill(self.pids.get(), signal.SIGTERM)
+            except OSError:
+                pass  # already gone
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CPUPool:
+    # PDF parsing, rasterizing and rendering run here instead of on request threads. A task that runs
+    # past its timeout or kills its worker takes the pool down with it; the pool is rebuilt, and every
+    # task that was in it is retried once on its own. Any other exception from a task becomes TaskFailed.
+    def __init__(self, workers, timeout=60.0):
+        self.workers = workers
+        self.timeout = timeout
+        self._counts = {"tasks": 0, "failures": 0, "timeouts": 0, "crashes": 0, "restarts": 0}
+        self._workers = None
+        self._lock = threading.Lock()
+
+    def _get_workers(self):
+        with self._lock:
+            if self._workers is None:
+                self._workers = _Workers(self.workers)
+            return self._workers
+
+    def _restart(self, workers):
+        with self._lock:
+            if self._workers is not workers:
+                return  # another thread already replaced it
+            self._workers = None
+            self._counts["restarts"] += 1
+        workers.stop()
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, None
+        if workers is not None:
+            workers.stopped = True
+            workers.executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts, workers=self.workers, timeout=self.timeout)
+
+    def warm_up(self):
+        # Starts the workers now rather than on the first upload.
+        if self.workers < 1 or in_worker():
+            return
+        list(self._get_workers().executor.map(_ready, range(self.workers)))
+
+    def run(self, func, *args, timeout=None):
+        # Runs inline when the pool is off, or when already inside a worker (batch extraction processes).
+        name = getattr(func, "__name__", "task").lstrip("_")
+        if self.workers < 1 or in_worker():
+            try:
+                return func(*args)
+            except Exception as e:
+                raise _failed(name, e) from e
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            self._counts["tasks"] += 1
+        workers = self._get_workers()
+        try:
+            future = workers.submit(func, *args)
+        except RuntimeError:
+            if not workers.stopped:
+                raise
+            # Another thread stopped this pool between our lookup and the submit.
+        else:
+            try:
+                return self._result(future, name, timeout, workers)
+            except BrokenProcessPool:
+                self._restart(workers)
+            except CancelledError:
+                pass  # still queued when another task's timeout or crash stopped the pool
+        # The pool went down while this task was in it, possibly because of another task. Run it again
+        # in a process of its own, so a PDF that crashes the parser only ever takes itself down.
+        isolated = _Workers(1, warm=False)
+        try:
+            return self._result(isolated.submit(func, *args), name, timeout, isolated)
+        except BrokenProcessPool:
+            with self._lock:
+                self._counts["crashes"] += 1
+            raise WorkerCrashed(f"{name} crashed its worker process") from None
+        finally:
+            isolated.stop()
+
+    def _result(self, future, name, timeout, workers):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            if workers is self._workers:
+                self._restart(workers)
+            else:
+                workers.stop()
+            with self._lock:
+                self._counts["timeouts"] += 1
+            raise TaskTimeout(f"{name} took longer than {timeout:g}s and was stopped") from None
+        except (BrokenProcessPool, CancelledError):
+            raise
+        except Exception as e:
+            with self._lock:
+                self._counts["failures"] += 1
+            raise _failed(name, e) from e
+
+    def map(self, func, argument_lists, timeout=None):
+        # Several tasks side by side, each with run()'s timeout and retry.
+        argument_lists = list(argument_lists)
+        if len(argument_lists) < 2 or self.workers < 2 or in_worker():
+            return [self.run(func, *args, timeout=timeout) for args in argument_lists]
+        with ThreadPoolExecutor(max_workers=min(len(argument_lists), self.workers)) as threads:
+            return list(threads.map(lambda args: self.run(func, *args, timeout=timeout), argument_lists))
+
+
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_cpu_pool():
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            workers = os.getenv("REZUP_CPU_WORKERS")
+            _shared_pool = CPUPool(
+                workers=min(4, os.cpu_count() or 1) if workers is None else int(workers),
+                timeout=float(os.getenv("REZUP_CPU_TIMEOUT", 60)),
+            )
+        return _shared_pool
+
+
+def run_cpu(func, *args, timeout=None):
+    return get_cpu_pool().run(func, *args, timeout=timeout)
@@ -0,0 +1,33 @@
+import re
+
+
+def extract_score_from_evaluation(evaluation_text):
+    match = re.search(r'(\d{1,3})%', evaluation_text)
+    return int(match.group(1)) if match else 0
+
+
+def extract_missing_keywords(evaluation_text, job=None):
+    # job: a JobAnalysis; merges spellings of the same skill and orders by the JD's weights.
+    lines = evaluation_text.split('\n')
+    keywords = []
+    in_section = False
+    for line in lines:
+        if "missing keywords" in line.lower():
+            in_section = True
+        elif in_section and line.strip().startswith('-'):
+            keywords.append(line.strip()[1:].strip())
+        elif in_section and not line.strip():
+            break
+    return job.normalize_keywords(keywords) if job is not None else keywords
+
+
+def evaluate_resume_progress(original_score, optimized_score, original_missing, optimized_missing):
+    improvement = optimized_score - original_score
+    recovered_keywords = set(original_missing) - set(optimized_missing)
+    return {
+        "original_score": original_score,
+        "optimized_score": optimized_score,
+        "improvement": improvement,
+        "recovered_keywords": list(recovered_keywords),
+        "remaining_missing": list(set(optimized_missing))
+    }
@@ -0,0 +1,122 @@
+import json
+import os
+import random
+import threading
+import time
+
+FAKE_EVALUATION = """Percentage Match: 72%
+
+Missing Keywords:
+- Kubernetes
+- Terraform
+- CI/CD
+
+Final Thoughts: A solid match; add the missing infrastructure keywords."""
+
+FAKE_REPORT = {
+    "score": 72,
+    "present_keywords": [{"keyword": "Python", "count": 3}, {"keyword": "AWS", "count": 2}],
+    "missing_keywords": [{"keyword": "Kubernetes", "priority": "High"}, {"keyword": "Terraform", "priority": "Medium"},
+                         {"keyword": "CI/CD", "priority": "Low"}],
+    "formatting_issues": ["Dates use mixed formats"],
+    "recommendations": ["Add the missing infrastructure keywords in context"],
+}
+
+FAKE_RESUME = """## Jane Doe
+jane@example.com | linkedin.com/in/janedoe
+
+### Professional Summary
+Backend engineer with 6 years building Python services on AWS.
+
+### Technical Skills
+**Languages:** Python, SQL, Go
+**Cloud:** AWS, Docker, Kubernetes, Terraform, CI/CD
+
+### Work Experience
+**Senior Engineer, Acme Corp**
+- Cut API latency by 40% by moving hot paths to async workers
+- Led migration of 30 services to Kubernetes
+
+### Education
+B.Sc. Computer Science"""
+
+
+class FakeQuotaError(Exception):
+    # Shaped like google.api_core's ResourceExhausted: an HTTP status in .code.
+    code = 429
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeStream:
+    def __init__(self, chunks, usage):
+        self._chunks = chunks
+        self.usage_metadata = usage
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield FakeResponse(chunk)
+
+
+class FakeModel:
+    # Drop-in stand-in for GenerativeModel: no network, configurable latency and simulated 429s.
+    def __init__(self, model_name="fake", latency=0.2, error_rate=0.0, chunk_size=80, seed=None,
+                 generation_config=None, response_size=0):
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self.response_size = response_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _reply(self, contents):
+        prompt = contents[-1] if contents and isinstance(contents[-1], str) else ""
+        if self.generation_config.get("response_mime_type") == "application/json":
+            report = dict(FAKE_REPORT)
+            # response_size pads the reply with extra recommendations so it stays valid JSON.
+            while self.response_size and len(json.dumps(report)) < self.response_size:
+                report["recommendations"] = report["recommendations"] + ["Quantify one more achievement"]
+            return json.dumps(report)
+        text = FAKE_RESUME if "generate an improved resume" in prompt else FAKE_EVALUATION
+        if self.response_size and len(text) < self.response_size:
+            filler = "\n- Delivered measurable results for the team"
+            text += filler * -(-(self.response_size - len(text)) // len(filler))
+        return text
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.failures += 1
+        time.sleep(self.latency)
+        if fail:
+            raise FakeQuotaError("429 Resource has been exhausted (simulated)")
+        text = self._reply(contents)
+        usage = FakeUsage(sum(len(part) if isinstance(part, str) else 258 for part in contents) // 4,
+                          len(text) // 4)
+        if stream:
+            return FakeStream([text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)], usage)
+        return FakeResponse(text, usage)
+
+
+def fake_model_from_env(model_name, generation_config=None):
+    seed = os.getenv("REZUP_FAKE_SEED")
+    return FakeModel(model_name, latency=float(os.getenv("REZUP_FAKE_LATENCY", 0.2)),
+                     error_rate=float(os.getenv("REZUP_FAKE_ERROR_RATE", 0)), generation_config=generation_config,
+                     seed=None if seed is None else int(seed),
+                     response_size=int(os.getenv("REZUP_FAKE_RESPONSE_SIZE", 0)))
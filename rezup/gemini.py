@@ -0,0 +1,61 @@
+from rezup.admission import get_model_gate
+from rezup.cache import get_response_cache, make_cache_key
+from rezup.client import ModelConfig, get_model
+from rezup.job_analysis import job_text_for_model
+from rezup.planner import estimate_contents_tokens, get_usage_ledger
+from rezup.scheduler import INTERACTIVE, get_scheduler
+from rezup.streaming import stream_cached
+from rezup.tracing import span
+
+
+def get_gemini_response(input_text, pdf_content, prompt, on_chunk=None, priority=INTERACTIVE, schema=None):
+    # schema switches the call to JSON mode; see rezup/structured.py.
+    with span("get_gemini_response") as trace:
+        trace.set(bytes_in=len(input_text) + len(prompt) + sum(len(part["data"]) for part in pdf_content or []))
+        if on_chunk is not None:
+            chunks = []
+            for text in stream_gemini_response(input_text, pdf_content, prompt, priority):
+                on_chunk(text)
+                chunks.append(text)
+            text = "".join(chunks)
+            trace.set(bytes_out=len(text))
+            return text
+        input_text = job_text_for_model(input_text)
+        contents = [input_text, *(pdf_content or []), prompt]
+        config = ModelConfig.from_env(response_schema=schema)
+        trace.set(cache="hit")
+
+        def compute():
+            trace.set(cache="miss")
+            return get_scheduler().call(call_model, key=key, priority=priority,
+                                        tokens=estimate_contents_tokens(contents))
+
+        def call_model():
+            # Cache hits never reach the gate; only real model calls count against it.
+            with get_model_gate().slot():
+                response = get_model(config).generate_content(contents, request_options=config.request_options())
+            usage = get_usage_ledger().record(contents, response)
+            trace.set(tokens_in=usage["actual_tokens"], tokens_out=usage["output_tokens"])
+            return response.text
+
+        key = make_cache_key(config.cache_name(), prompt, input_text, pdf_content)
+        text = get_response_cache().get_or_compute(key, compute)
+        trace.set(bytes_out=len(text or ""))
+        return text
+
+
+def stream_gemini_response(input_text, pdf_content, prompt, priority=INTERACTIVE):
+    input_text = job_text_for_model(input_text)
+    contents = [input_text, *(pdf_content or []), prompt]
+    config = ModelConfig.from_env()
+
+    def open_stream():
+        # Only opening the stream is scheduled and retried; an error mid-stream reaches the caller.
+        return get_scheduler().call(
+            lambda: get_model(config).generate_content(contents, stream=True, request_options=config.request_options()),
+            priority=priority, tokens=estimate_contents_tokens(contents))
+
+    key = make_cache_key(config.cache_name(), prompt, input_text, pdf_content)
+    return stream_cached(get_response_cache(), key, open_stream,
+                         on_complete=lambda response: get_usage_ledger().record(contents, response),
+                         gate=get_model_gate())
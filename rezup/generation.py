@@ -0,0 +1,37 @@
+from rezup.gemini import get_gemini_response
+from rezup.incremental import incremental_evaluation, model_verifier
+from rezup.pdf import create_pdf
+from rezup.pipeline import Pipeline
+from rezup.prompts import improved_resume_prompt, input_prompt1, input_prompt2, input_prompt4
+from rezup.structured import get_ats_report
+from rezup.tracing import traced
+
+
+@traced("generate_improved_resume")
+def generate_improved_resume(input_text, pdf_content, on_chunk=None):
+    return get_gemini_response(input_text, pdf_content, improved_resume_prompt, on_chunk)
+
+
+def build_generate_pipeline(input_text, pdf_content, resume_text, on_chunk=None, render=create_pdf):
+    # The original evaluation and the rewrite share inputs, so they run side by side.
+    # The rewrite is then scored against the original report's keywords instead of a second full evaluation.
+    # render(improved_resume) produces the "pdf" result: a buffer by default, or e.g. an artifact ID.
+    def evaluate_improved(original_evaluation, improved_resume):
+        return incremental_evaluation(original_evaluation, resume_text, improved_resume,
+                                      verify=model_verifier(input_text))
+
+    pipeline = Pipeline()
+    pipeline.add("original_evaluation", lambda: get_ats_report(input_text, pdf_content))
+    pipeline.add("improved_resume", lambda: generate_improved_resume(input_text, pdf_content, on_chunk))
+    pipeline.add("improved_evaluation", evaluate_improved, depends_on=["original_evaluation", "improved_resume"])
+    pipeline.add("pdf", lambda improved_resume: render(improved_resume), depends_on=["improved_resume"])
+    return pipeline
+
+
+def build_report_pipeline(input_text, pdf_content):
+    pipeline = Pipeline()
+    pipeline.add("evaluation", lambda: get_gemini_response(input_text, pdf_content, input_prompt1))
+    pipeline.add("suggestions", lambda: get_gemini_response(input_text, pdf_content, input_prompt2))
+    pipeline.add("keywords", lambda: get_gemini_response(input_text, pdf_content, input_prompt4))
+    pipeline.add("ats_report", lambda: get_ats_report(input_text, pdf_content))
+    return pipeline
@@ -0,0 +1,131 @@
+import difflib
+import json
+import os
+import re
+
+from rezup.keyword_match import canonical_terms, tokenize
+from rezup.structured import render_report
+
+PRIORITY_WEIGHTS = {"High": 3, "Medium": 2, "Low": 1}
+# Share of the gap to 100 that keywords alone can close; formatting and experience are not re-checked.
+KEYWORD_SHARE = 0.5
+HEADING_PATTERN = re.compile(r"^\s*(#{1,6}\s+\S|[A-Z][A-Z &/]{2,}:?\s*$|\*\*[^*]+\*\*\s*$)")
+
+verify_prompt = """You are checking a rewritten resume. Below are only the sections that changed.
+For each keyword in the list, decide whether these sections now clearly demonstrate it, even if worded differently.
+Reply with a single JSON object: {"addressed": [keywords from the list that are now covered]}.
+Keywords: """
+
+
+def split_sections(text):
+    # A heading line (markdown, ALL CAPS or **bold**) starts a new section.
+    sections = []
+    current = []
+    for line in text.splitlines():
+        if HEADING_PATTERN.match(line) and current:
+            sections.append("\n".join(current))
+            current = []
+        if line.strip():
+            current.append(line.rstrip())
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def changed_sections(original_text, improved_text):
+    # Sections of the rewrite with lines that are not in the original, compared line by line.
+    original_lines = [line.strip().lower() for line in original_text.splitlines() if line.strip()]
+    changed = []
+    for section in split_sections(improved_text):
+        lines = [line.strip().lower() for line in section.splitlines()]
+        matcher = difflib.SequenceMatcher(None, original_lines, lines, autojunk=False)
+        if any(tag in ("replace", "insert") for tag, *_ in matcher.get_opcodes()):
+            changed.append(section)
+    return changed
+
+
+class KeywordIndex:
+    # Finds keywords in a text by canonical skill (so "k8s" covers "Kubernetes") or as a whole phrase.
+    def __init__(self, text):
+        self.lower = text.lower()
+        self.terms = canonical_terms(tokenize(text))
+
+    def count(self, keyword):
+        terms = canonical_terms(tokenize(keyword))
+        if len(terms) == 1:
+            term = next(iter(terms))
+            if self.terms.get(term):
+                return self.terms[term]
+        pattern = r"(?<![\w+#])" + re.escape(keyword.lower().strip()) + r"(?![\w+#])"
+        return len(re.findall(pattern, self.lower))
+
+
+def incremental_evaluation(original_report, original_text, improved_text, verify=None):
+    # Re-scores the rewrite from the original report's keyword sets instead of a fresh full evaluation.
+    # verify(changed_text, keywords) -> addressed keywords, for matches only a model can judge.
+    improved = KeywordIndex(improved_text)
+    present = []
+    dropped = []
+    for item in original_report["present_keywords"]:
+        count = improved.count(item["keyword"])
+        if count:
+            present.append({"keyword": item["keyword"], "count": count})
+        else:
+            dropped.append(item)
+    missing = []
+    recovered = []
+    for item in original_report["missing_keywords"]:
+        count = improved.count(item["keyword"])
+        if count:
+            present.append({"keyword": item["keyword"], "count": count})
+            recovered.append(item)
+        else:
+            missing.append(item)
+
+    sections = changed_sections(original_text, improved_text)
+    if verify is not None and missing and sections:
+        addressed = {keyword.lower() for keyword in verify("\n\n".join(sections), [item["keyword"] for item in missing])}
+        for item in [item for item in missing if item["keyword"].lower() in addressed]:
+            missing.remove(item)
+            recovered.append(item)
+            present.append({"keyword": item["keyword"], "count": 1})
+
+    # Recovered keywords close their priority-weighted part of KEYWORD_SHARE of the gap to 100; dropped ones
+    # give theirs back. The result is an estimate, not a fresh evaluation.
+    score = original_report["score"]
+    missing_weight = sum(PRIORITY_WEIGHTS.get(item["priority"], 2) for item in original_report["missing_keywords"])
+    recovered_weight = sum(PRIORITY_WEIGHTS.get(item["priority"], 2) for item in recovered)
+    if missing_weight:
+        score += (100 - original_report["score"]) * KEYWORD_SHARE * recovered_weight / missing_weight
+    if original_report["present_keywords"]:
+        score -= original_report["score"] * len(dropped) / len(original_report["present_keywords"])
+    report = {
+        "score": max(0, min(100, round(score))),
+        "present_keywords": present,
+        "missing_keywords": missing,
+        "formatting_issues": [],
+        "recommendations": [f"Mention {item['keyword']} again; the rewrite dropped it" for item in dropped],
+    }
+    report["text"] = render_report(report) + "\n\n(Estimated from the keywords the rewrite added or dropped.)"
+    report["source"] = "incremental"
+    report["estimated"] = True
+    report["changed_sections"] = len(sections)
+    return report
+
+
+def model_verifier(job_description):
+    # Returns a verify() for incremental_evaluation, or None when REZUP_INCREMENTAL_VERIFY is off.
+    if os.getenv("REZUP_INCREMENTAL_VERIFY", "0") != "1":
+        return None
+    from rezup.gemini import get_gemini_response
+
+    def verify(changed_text, keywords):
+        content = [{"mime_type": "text/plain", "data": changed_text.encode("utf-8")}]
+        reply = get_gemini_response(job_description, content, verify_prompt + ", ".join(keywords))
+        start, end = reply.find("{"), reply.rfind("}")
+        try:
+            addressed = json.loads(reply[start:end + 1]).get("addressed", [])
+        except ValueError:
+            return []
+        return [keyword for keyword in addressed if isinstance(keyword, str)]
+    return verify
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from rezup.keyword_match import BENEFIT_PATTERN, SKILL_ALIASES, canonical_terms, get_job_index, tokenize
+
+SENIORITY_LEVELS = [
+    ("intern", r"\bintern(ship)?\b"),
+    ("junior", r"\b(junior|jr\.?|entry[- ]level|graduate)\b"),
+    ("principal", r"\b(principal|distinguished)\b"),
+    ("staff", r"\bstaff\b"),
+    ("lead", r"\b(lead|head of|manager)\b"),
+    ("senior", r"\b(senior|sr\.?)\b"),
+    ("mid", r"\b(mid[- ]level|intermediate)\b"),
+]
+YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)", re.IGNORECASE)
+PREFERRED_PATTERN = re.compile(r"nice[- ]to[- ]have|preferred|\ba plus\b|\bbonus\b|desirable|optional|ideally",
+                               re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r"[^\n.!?;•]+")
+PRIORITY_SUFFIX = re.compile(r"\s*\((high|medium|low)\)\s*$", re.IGNORECASE)
+REQUIREMENT_CUES = re.compile(r"\b(experience|knowledge|proficien\w*|familiar\w*|ability|skills?|degree|must|"
+                              r"required|responsib\w*|understanding)\b", re.IGNORECASE)
+DUTY_HEADINGS = re.compile(r"responsib|duties|what you.ll do|the role|your impact", re.IGNORECASE)
+MAX_PROMPT_LINES = 25
+
+
+class UnknownJobDescription(LookupError):
+    def __init__(self, jd_id):
+        super().__init__(f"Unknown or expired jd_id '{jd_id}'; send the job description again")
+        self.jd_id = jd_id
+
+
+def job_description_id(job_description):
+    return hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+
+
+def detect_seniority(job_description):
+    # The title line decides when it names a level; otherwise the first level mentioned anywhere.
+    lines = [line for line in job_description.splitlines() if line.strip()]
+    title = lines[0] if lines else ""
+    level = None
+    for text in (title, job_description):
+        for name, pattern in SENIORITY_LEVELS:
+            if re.search(pattern, text, re.IGNORECASE):
+                level = name
+                break
+        if level:
+            break
+    years = [int(match.group(1)) for match in YEARS_PATTERN.finditer(job_description) if int(match.group(1)) <= 30]
+    return {"level": level, "min_years": min(years) if years else None}
+
+
+class JobAnalysis:
+    # A job description parsed once: normalized skills with weights, required vs. preferred, seniority.
+    def __init__(self, job_description):
+        self.id = job_description_id(job_description)
+        self.text = job_description
+        self.index = get_job_index(job_description)
+        lines = [line.strip() for line in job_description.splitlines() if line.strip()]
+        self.title = lines[0][:120] if lines else ""
+        self.seniority = detect_seniority(job_description)
+        self.sentences = [sentence.strip(" -*\t") for sentence in SENTENCE_PATTERN.findall(job_description)
+                          if sentence.strip(" -*\t")]
+        mentions = {}
+        for position, sentence in enumerate(self.sentences):
+            if BENEFIT_PATTERN.search(sentence):
+                continue
+            for term in canonical_terms(tokenize(sentence), self.index.vocabulary):
+                mentions.setdefault(term, []).append(position)
+        self.skills = []
+        for term, weight in sorted(self.index.weights.items(), key=lambda item: (-item[1], item[0])):
+            positions = mentions.get(term, [])
+            # Preferred only when every sentence that mentions it says so.
+            preferred = bool(positions) and all(PREFERRED_PATTERN.search(self.sentences[p]) for p in positions)
+            self.skills.append({"skill": term, "weight": round(weight, 2), "required": not preferred,
+                                "aliases": SKILL_ALIASES.get(term, [])})
+        self._mentions = mentions
+        self._requirements = None
+        self.created = self.accessed = time.time()
+
+    def canonical(self, keyword):
+        # "K8s", "kubernetes" and "Kubernetes (High)" all map to "kubernetes"; unknown phrases are lowercased.
+        keyword = PRIORITY_SUFFIX.sub("", keyword)
+        terms = canonical_terms(tokenize(keyword))
+        if len(terms) == 1:
+            return next(iter(terms))
+        return " ".join(keyword.lower().split())
+
+    def weight(self, keyword):
+        return self.index.weights.get(self.canonical(keyword), 0.0)
+
+    def normalize_keywords(self, keywords, key=None, rank=True):
+        # Drops spellings of a skill already listed; rank puts the skills the JD stresses most first.
+        # key: maps an item to its keyword, for report entries such as {"keyword": ..., "priority": ...}.
+        name = key or (lambda keyword: keyword)
+        seen = set()
+        unique = []
+        for keyword in keywords:
+            canonical = self.canonical(name(keyword))
+            if canonical not in seen:
+                seen.add(canonical)
+                unique.append(keyword)
+        return sorted(unique, key=lambda keyword: -self.weight(name(keyword))) if rank else unique
+
+    def prompt_text(self):
+        # A compact restatement for prompts: the normalized requirements plus only the JD sentences that
+        # carry them. Company blurbs, benefits and legal boilerplate are left out.
+        required = [skill["skill"] for skill in self.skills if skill["required"]]
+        preferred = [skill["skill"] for skill in self.skills if not skill["required"]]
+        lines = [f"Job title: {self.title}"]
+        level, years = self.seniority["level"], self.seniority["min_years"]
+        if level or years:
+            lines.append("Seniority: " + " ".join(filter(None, [level, f"({years}+ years)" if years else None])))
+        if required:
+            lines.append("Required skills: " + ", ".join(required))
+        if preferred:
+            lines.append("Preferred skills: " + ", ".join(preferred))
+        requirements = self.requirements()
+        if requirements:
+            lines.append("Key requirements:")
+            lines += [f"- {requirement['text']}" for requirement in requirements[:MAX_PROMPT_LINES]]
+        text = "\n".join(lines)
+        return text if len(text) < len(self.text) else self.text
+
+    def requirements(self):
+        # The JD sentences that name a skill, a number of years or a requirement cue, after the title line.
+        # Every line under a responsibilities heading is kept; headings and benefit sentences are left out.
+        # weight: the skills they mention; "nice to have" sentences count half.
+        if self._requirements is None:
+            terms = {}
+            for term, positions in self._mentions.items():
+                for position in positions:
+                    terms.setdefault(position, []).append(term)
+            duties = False
+            for position, sentence in enumerate(self.sentences):
+                if sentence.endswith(":"):
+                    duties = bool(DUTY_HEADINGS.search(sentence))
+                    terms.pop(position, None)
+                    continue
+                if BENEFIT_PATTERN.search(sentence):
+                    continue
+                if duties or YEARS_PATTERN.search(sentence) or REQUIREMENT_CUES.search(sentence):
+                    terms.setdefault(position, [])
+            self._requirements = []
+            for position in sorted(terms):
+                if position == 0:
+                    continue
+                weight = 1 + sum(self.index.weights.get(term, 0.0) for term in terms[position])
+                is_required = not PREFERRED_PATTERN.search(self.sentences[position])
+                self._requirements.append({"text": self.sentences[position], "skills": sorted(terms[position]),
+                                           "weight": round(weight if is_required else weight / 2, 2),
+                                           "required": is_required})
+        return self._requirements
+
+    def describe(self):
+        return {
+            "jd_id": self.id,
+            "title": self.title,
+            "seniority": self.seniority,
+            "skills": self.skills,
+            "requirements": self.requirements(),
+            "characters": len(self.text),
+            "prompt_characters": len(self.prompt_text()),
+        }
+
+
+class JobAnalysisStore:
+    def __init__(self, max_entries=256, ttl=24 * 60 * 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, job_description):
+        existing = self.get(job_description_id(job_description), required=False)
+        if existing is not None:
+            return existing
+        analysis = JobAnalysis(job_description)
+        with self._lock:
+            analysis = self._entries.setdefault(analysis.id, analysis)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+
+    def get(self, jd_id, required=True):
+        with self._lock:
+            analysis = self._entries.get(jd_id)
+            if analysis is not None and self.ttl is not None and time.time() - analysis.accessed > self.ttl:
+                del self._entries[jd_id]
+                analysis = None
+            if analysis is None:
+                if required:
+                    raise UnknownJobDescription(jd_id)
+                return None
+            analysis.accessed = time.time()
+            self._entries.move_to_end(jd_id)
+            return analysis
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_job_analysis_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = JobAnalysisStore(
+                max_entries=int(os.getenv("REZUP_JD_STORE_SIZE", 256)),
+                ttl=float(os.getenv("REZUP_JD_STORE_TTL", 24 * 60 * 60)) or None,
+            )
+        return _shared_store
+
+
+def get_job_analysis(job_description):
+    return get_job_analysis_store().analyze(job_description)
+
+
+def compact_prompts_enabled():
+    return os.getenv("REZUP_JD_COMPACT", "1") == "1"
+
+
+def job_text_for_model(job_description):
+    # What the model sees in place of the raw job description.
+    if not job_description or not compact_prompts_enabled():
+        return job_description
+    return get_job_analysis(job_description).prompt_text()
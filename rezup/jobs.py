@@ -0,0 +1,246 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class UnknownJob(LookupError):
+    pass
+
+
+class InvalidJob(ValueError):
+    status = 400
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # A webhook host on the allowlist must not bounce the request somewhere that isn't.
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def webhook_hosts():
+    # Hosts callback_url may point at; none configured means webhooks are off.
+    return {host.strip().lower() for host in os.getenv("REZUP_WEBHOOK_HOSTS", "").split(",") if host.strip()}
+
+
+def check_callback_url(url):
+    # The server fetches this URL itself, so only http(s) to an allowlisted host is accepted.
+    hosts = webhook_hosts()
+    if not hosts:
+        raise InvalidJob("Webhooks are disabled on this server; set REZUP_WEBHOOK_HOSTS to enable them")
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme not in ("http", "https") or (parsed.hostname or "").lower() not in hosts:
+        raise InvalidJob(f"callback_url must be an http(s) URL on one of: {', '.join(sorted(hosts))}")
+    return url
+
+
+class JobStore:
+    def __init__(self, path, lease=600, ttl=24 * 60 * 60):
+        # lease: a running job not updated for this long is assumed orphaned by a dead worker.
+        self.path = path
+        self.lease = lease
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, params TEXT NOT NULL, input BLOB, "
+            "progress TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL, "
+            "available REAL NOT NULL, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available)")
+
+    def submit(self, kind, params, data=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, ?, '{}', NULL, NULL, 0, ?, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), data, now, now, now),
+            )
+        return job_id
+
+    def claim(self):
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim the same job.
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, kind, params, input, attempts FROM jobs "
+                    "WHERE (status = ? AND available <= ?) OR (status = ? AND updated < ?) "
+                    "ORDER BY available LIMIT 1",
+                    (QUEUED, now, RUNNING, now - self.lease),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, progress = '{}', attempts = attempts + 1, updated = ? WHERE id = ?",
+                        (RUNNING, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        job_id, kind, params, data, attempts = row
+        return {"job_id": job_id, "kind": kind, "params": json.loads(params), "input": data,
+                "attempts": attempts + 1}
+
+    def update(self, job_id, progress):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET progress = ?, updated = ? WHERE id = ?",
+                               (json.dumps(progress), time.time(), job_id))
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, input = NULL, updated = ? WHERE id = ?",
+                (FAILED if error else DONE, None if result is None else json.dumps(result), error,
+                 time.time(), job_id),
+            )
+
+    def requeue(self, job_id, delay):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = ?, available = ?, updated = ? WHERE id = ?",
+                               (QUEUED, now + delay, now, job_id))
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, status, progress, result, error, attempts, created, updated FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            raise UnknownJob(f"Unknown or expired job_id '{job_id}'")
+        kind, status, progress, result, error, attempts, created, updated = row
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "status": status,
+            "progress": json.loads(progress),
+            "result": None if result is None else json.loads(result),
+            "error": error,
+            "attempts": attempts,
+            "created": created,
+            "updated": updated,
+        }
+
+    def purge(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?",
+                               (DONE, FAILED, time.time() - self.ttl))
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class JobQueue:
+    def __init__(self, store, handlers, workers=2, poll_interval=1.0, max_attempts=3):
+        # handlers maps a job kind to func(job, report) -> result; report(**progress) records progress.
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def submit(self, kind, params, data=None):
+        if kind not in self.handlers:
+            raise InvalidJob(f"Unknown job kind '{kind}'")
+        if params.get("callback_url"):
+            check_callback_url(params["callback_url"])
+        self.store.purge()
+        job_id = self.store.submit(kind, params, data)
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def start(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"rezup-job-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def run_forever(self):
+        self.start()
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self):
+        while True:
+            job = self.store.claim()
+            if job is None:
+                # Other processes may enqueue too, so idle workers still poll the database.
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._run(job)
+
+    def _run(self, job):
+        job_id = job["job_id"]
+        progress = {}
+        progress_lock = threading.Lock()
+
+        def report(**changes):
+            with progress_lock:
+                progress.update(changes)
+                self.store.update(job_id, progress)
+
+        try:
+            result = self.handlers[job["kind"]](job, report)
+        except Exception as e:
+            retry_after = getattr(e, "retry_after", None)
+            if retry_after is not None and job["attempts"] < self.max_attempts:
+                # Turned away by a busy model; try again later instead of failing the job.
+                self.store.requeue(job_id, retry_after)
+                return
+            self.store.finish(job_id, error=str(e))
+        else:
+            self.store.finish(job_id, result=result)
+        self._notify(job)
+
+    def _notify(self, job):
+        url = job["params"].get("callback_url")
+        if not url:
+            return
+        try:
+            # Checked again here: the allowlist may have changed since the job was queued.
+            check_callback_url(url)
+            body = json.dumps(self.store.get(job["job_id"])).encode("utf-8")
+            request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+            urllib.request.build_opener(_NoRedirect).open(request, timeout=10).close()
+        except Exception as e:
+            print(f"Job {job['job_id']}: webhook to {url} failed: {e}")
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_job_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            path = os.getenv("REZUP_JOB_DB") or os.path.join(tempfile.gettempdir(), "rezup_jobs.sqlite")
+            _shared_store = JobStore(path, ttl=float(os.getenv("REZUP_JOB_TTL", 24 * 60 * 60)))
+        return _shared_store
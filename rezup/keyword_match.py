@@ -0,0 +1,208 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+
+# Canonical skill -> spellings that should count as the same thing.
+SKILL_ALIASES = {
+    "python": ["python3", "py"],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": ["ts"],
+    "node.js": ["node", "nodejs", "node js"],
+    "react": ["react.js", "reactjs"],
+    "angular": ["angularjs", "angular.js"],
+    "vue": ["vue.js", "vuejs"],
+    "java": [],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    ".net": ["dotnet", "asp.net"],
+    "go": ["golang"],
+    "rust": [],
+    "scala": [],
+    "kotlin": [],
+    "sql": ["t-sql", "pl/sql"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "elasticsearch": ["elastic search", "elk"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "docker": ["containers", "containerization"],
+    "kubernetes": ["k8s"],
+    "terraform": [],
+    "ci/cd": ["cicd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "git": ["github", "gitlab"],
+    "linux": ["unix"],
+    "rest api": ["rest", "restful", "rest apis", "restful apis"],
+    "graphql": [],
+    "microservices": ["microservice", "micro-services"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl", "neural networks", "neural network"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": ["cv"],
+    "large language models": ["llm", "llms", "large language model"],
+    "generative ai": ["genai", "gen ai"],
+    "tensorflow": ["tf"],
+    "pytorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pandas": [],
+    "numpy": [],
+    "spark": ["pyspark", "apache spark"],
+    "hadoop": [],
+    "kafka": ["apache kafka"],
+    "airflow": ["apache airflow"],
+    "data pipelines": ["data pipeline", "etl", "elt"],
+    "data visualization": ["tableau", "power bi", "powerbi"],
+    "statistics": ["statistical analysis", "statistical modeling"],
+    "a/b testing": ["ab testing", "experimentation"],
+    "mlops": ["ml ops"],
+    "agile": ["scrum", "kanban"],
+    "flask": [],
+    "django": [],
+    "fastapi": [],
+    "html": ["html5"],
+    "css": ["css3"],
+    "excel": ["microsoft excel"],
+    "communication": ["communication skills"],
+    "leadership": ["team lead", "mentoring"],
+}
+
+STOPWORDS = set("""
+a about above after again against all also an and any are as at be because been being below between both but by
+can could did do does doing down during each etc few for from further had has have having he her here hers him his
+how i if in into is it its itself just least less like ll may me might more most must my no nor not now of off on
+once only or other our ours out over own per same she should so some such than that the their theirs them then there
+these they this those through to too under until up upon us very via was we well were what when where which while who
+whom why will with within without would you your yours
+ability able across based work working works team teams role roles candidate candidates including include includes
+experience experienced years year strong excellent good great knowledge skill skills understanding familiarity
+preferred required requirements responsibilities plus using use used new join looking opportunity company environment
+etc e.g i.e related relevant degree equivalent field minimum least ideal ideally must-have nice-to-have day days
+""".split())
+
+TOKEN_PATTERN = re.compile(r"\.net\b|[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9+#./-]*")
+MAX_PHRASE = 3
+K1 = 1.2
+B = 0.75
+AVERAGE_RESUME_TOKENS = 600
+PRESENCE_WEIGHT = 0.7
+# Sentences about what the employer gives, not what the candidate needs.
+BENEFIT_PATTERN = re.compile(r"\bwe offer\b|\bbenefits?\b|\bperks?\b|\bpto\b|paid time off|\bvacation\b|\b401\(?k\)?|"
+                             r"\b(health|dental|vision|medical) (insurance|coverage|plans?)\b|\bparental leave\b|"
+                             r"\bstock options\b|\bequity\b|\bsalary\b|\bcompensation\b|\bbonus(es)? scheme\b",
+                             re.IGNORECASE)
+
+_ALIAS_TO_SKILL = {}
+_PHRASE_STARTS = set()
+for _skill, _aliases in SKILL_ALIASES.items():
+    for _alias in [_skill, *_aliases]:
+        _ALIAS_TO_SKILL[_alias] = _skill
+        if " " in _alias:
+            _PHRASE_STARTS.add(_alias.split(" ", 1)[0])
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def canonical_terms(tokens, vocabulary=None):
+    # Longest alias match wins, so "machine learning" is not also counted as "machine" and "learning".
+    counts = Counter()
+    position = 0
+    while position < len(tokens):
+        term, size = tokens[position], 1
+        longest = min(MAX_PHRASE, len(tokens) - position) if term in _PHRASE_STARTS else 1
+        for length in range(longest, 0, -1):
+            skill = _ALIAS_TO_SKILL.get(" ".join(tokens[position:position + length]))
+            if skill is not None:
+                term, size = skill, length
+                break
+        if vocabulary is None or term in vocabulary:
+            counts[term] += 1
+        position += size
+    return counts
+
+
+def _looks_technical(word, at_sentence_start):
+    # Tools and products usually show up capitalised or with symbols (Snowflake, CI/CD). Acronyms only count
+    # when they are a known skill spelling: PTO, EOE and HR are not requirements.
+    if any(char.isdigit() or char in "+#./" for char in word):
+        return True
+    if word.isupper() and len(word) > 1:
+        return word.lower() in _ALIAS_TO_SKILL
+    return word[0].isupper() and not at_sentence_start
+
+
+class JobIndex:
+    def __init__(self, job_description):
+        tokens = tokenize(job_description)
+        counts = canonical_terms(tokens)
+        technical = set()
+        for sentence in re.split(r"[.!?\n•;:]+", job_description):
+            if BENEFIT_PATTERN.search(sentence):
+                continue
+            for position, word in enumerate(WORD_PATTERN.findall(sentence)):
+                if _looks_technical(word, position == 0):
+                    technical.add(word.lower().rstrip("./-"))
+        self.weights = {}
+        for term, count in counts.items():
+            if term in STOPWORDS or len(term) < 2 and term not in SKILL_ALIASES:
+                continue
+            known = term in SKILL_ALIASES
+            if not known and term not in technical:
+                continue
+            self.weights[term] = (1 + math.log(count)) * (2.0 if known else 1.0)
+        self.total_weight = sum(self.weights.values())
+        self.vocabulary = frozenset(self.weights)
+
+    def score(self, resume_text):
+        tokens = tokenize(resume_text)
+        counts = canonical_terms(tokens, self.vocabulary)
+        length_norm = K1 * (1 - B + B * len(tokens) / AVERAGE_RESUME_TOKENS)
+        achieved = 0.0
+        present = []
+        missing = []
+        for term, weight in self.weights.items():
+            frequency = counts.get(term, 0)
+            if frequency:
+                saturation = frequency * (K1 + 1) / (frequency + length_norm) / (K1 + 1)
+                achieved += weight * (PRESENCE_WEIGHT + (1 - PRESENCE_WEIGHT) * saturation)
+                present.append({"keyword": term, "count": frequency})
+            else:
+                missing.append({"keyword": term, "weight": round(weight, 2)})
+        present.sort(key=lambda item: (-item["count"], item["keyword"]))
+        missing.sort(key=lambda item: (-item["weight"], item["keyword"]))
+        score = round(100 * achieved / self.total_weight) if self.total_weight else 0
+        return {"score": score, "present_keywords": present, "missing_keywords": missing}
+
+    def score_many(self, resume_texts):
+        return [self.score(text) for text in resume_texts]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+MAX_INDEXES = 64
+
+
+def get_job_index(job_description):
+    key = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = JobIndex(job_description)
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def local_match(job_description, resume_text):
+    return get_job_index(job_description).score(resume_text)
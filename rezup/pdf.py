@@ -0,0 +1,194 @@
+import argparse
+import io
+import os
+import re
+import sys
+import threading
+import time
+from xml.sax.saxutils import escape
+
+from rezup.cpu_pool import CPUPool, get_cpu_pool, run_cpu
+from rezup.tracing import span
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+BULLET_PATTERN = re.compile(r"^\s*([-*•+])\s+(.*)$")
+NUMBERED_PATTERN = re.compile(r"^\s*(\d{1,3})[.)]\s+(.*)$")
+RULE_PATTERN = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+LINK_PATTERN = re.compile(r"\[([^\]]+)\]\(([^)\s]+)\)")
+BOLD_PATTERN = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+ITALIC_PATTERN = re.compile(r"(?<![*\w])\*(?!\s)(.+?)(?<!\s)\*(?![*\w])")
+CODE_PATTERN = re.compile(r"`([^`]+)`")
+LINK_COLOR = "#1a5fb4"
+
+_styles = None
+_styles_lock = threading.Lock()
+
+
+def get_pdf_styles():
+    # getSampleStyleSheet() builds dozens of styles; every PDF in the process shares one copy.
+    global _styles
+    with _styles_lock:
+        if _styles is None:
+            from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+            styles = getSampleStyleSheet()
+            styles.add(ParagraphStyle(name='RezUpHeader', fontName='Helvetica-Bold', fontSize=16, spaceAfter=12))
+            styles.add(ParagraphStyle(name='RezUpSubheader', fontName='Helvetica-Bold', fontSize=14, spaceAfter=8))
+            styles.add(ParagraphStyle(name='RezUpBody', fontSize=12, leading=14, spaceAfter=6))
+            styles.add(ParagraphStyle(name='RezUpBullet', parent=styles['RezUpBody'], leftIndent=18,
+                                      bulletIndent=6, spaceAfter=3))
+            _styles = styles
+        return _styles
+
+
+def inline_markup(text):
+    # Markdown inline syntax to ReportLab's paragraph markup. Escaping first means a stray "&" or "<"
+    # in the model's text can no longer break the paragraph parser.
+    links = []
+
+    def keep_link(match):
+        href = escape(match.group(2), {'"': "&quot;"})
+        links.append(f'<link href="{href}" color="{LINK_COLOR}">{escape(match.group(1))}</link>')
+        return f"\x00{len(links) - 1}\x00"
+
+    text = escape(LINK_PATTERN.sub(keep_link, text))
+    text = CODE_PATTERN.sub(r'<font face="Courier">\1</font>', text)
+    text = BOLD_PATTERN.sub(lambda match: f"<b>{match.group(1) or match.group(2)}</b>", text)
+    text = ITALIC_PATTERN.sub(r"<i>\1</i>", text)
+    return re.sub("\x00(\\d+)\x00", lambda match: links[int(match.group(1))], text)
+
+
+def paragraph(text, style, **options):
+    # Markup the parser rejects, such as crossed bold and italic ("**a *b** c*"), is shown literally.
+    from reportlab.platypus import Paragraph
+
+    try:
+        return Paragraph(inline_markup(text), style, **options)
+    except ValueError:
+        return Paragraph(escape(text), style, **options)
+
+
+def markdown_flowables(resume_text, styles=None):
+    from reportlab.platypus import HRFlowable, Spacer
+
+    styles = styles or get_pdf_styles()
+    story = []
+    blank = False
+    for line in resume_text.split('\n'):
+        line = line.rstrip()
+        if not line.strip():
+            # Runs of blank lines make one gap, not one per line.
+            if story and not blank:
+                story.append(Spacer(1, 12))
+            blank = True
+            continue
+        blank = False
+        heading = HEADING_PATTERN.match(line)
+        bullet = BULLET_PATTERN.match(line)
+        numbered = NUMBERED_PATTERN.match(line)
+        if heading:
+            style = styles['RezUpHeader'] if len(heading.group(1)) <= 2 else styles['RezUpSubheader']
+            story.append(paragraph(heading.group(2), style))
+        elif RULE_PATTERN.match(line):
+            story.append(HRFlowable(width="100%", thickness=0.5, spaceBefore=4, spaceAfter=4))
+        elif line.startswith('**') and line.endswith('**') and line.count('**') == 2:
+            story.append(paragraph(line[2:-2], styles['Heading3']))
+        elif bullet:
+            story.append(paragraph(bullet.group(2), styles['RezUpBullet'], bulletText="•"))
+        elif numbered:
+            story.append(paragraph(numbered.group(2), styles['RezUpBullet'], bulletText=f"{numbered.group(1)}."))
+        else:
+            story.append(paragraph(line, styles['RezUpBody']))
+    return story
+
+
+def render_pdf(resume_text, output=None):
+    # Writes into output (any binary file object, e.g. an open file) and returns it rewound.
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate
+
+    output = io.BytesIO() if output is None else output
+    SimpleDocTemplate(output, pagesize=letter).build(markdown_flowables(resume_text))
+    if output.seekable():
+        output.seek(0)
+    return output
+
+
+def _render_bytes(resume_text):
+    return render_pdf(resume_text).getvalue()
+
+
+def create_pdf(resume_text):
+    # A rewound BytesIO: hand it to send_file/download buttons as is.
+    # Layout runs on the CPU pool, off the request or script thread, and the bytes come back pickled.
+    with span("create_pdf") as trace:
+        data = run_cpu(_render_bytes, resume_text)
+        trace.set(bytes_in=len(resume_text), bytes_out=len(data))
+        return io.BytesIO(data)
+
+
+def render_pdfs(resume_texts, workers=None):
+    # Many resumes at once (batch jobs): returns PDF bytes in input order. Rendering uses the shared CPU pool,
+    # or a pool of its own when workers is given (0 renders inline).
+    arguments = [(text,) for text in resume_texts]
+    if workers is None:
+        return get_cpu_pool().map(_render_bytes, arguments)
+    pool = CPUPool(workers)
+    try:
+        return pool.map(_render_bytes, arguments)
+    finally:
+        pool.close()
+
+
+def benchmark(count, workers=None, resume_text=None):
+    if resume_text is None:
+        from rezup.fake_model import FAKE_RESUME as resume_text
+    _render_bytes(resume_text)  # import ReportLab and build the styles before timing
+    results = {}
+    for name, pool_workers in (("serial", 0), ("pool", workers or get_cpu_pool().workers)):
+        pool = CPUPool(pool_workers)
+        try:
+            pool.warm_up()  # start the workers before timing
+            started = time.perf_counter()
+            rendered = pool.map(_render_bytes, [(resume_text,)] * count)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.close()
+        results[name] = {"workers": pool_workers, "pdfs": len(rendered), "seconds": round(elapsed, 3),
+                         "pdfs_per_second": round(len(rendered) / elapsed, 1)}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render markdown resumes to PDF, or measure rendering speed.")
+    parser.add_argument("resumes", nargs="*", help="Markdown resume files to render")
+    parser.add_argument("--out-dir", default=".", help="Where rendered PDFs are written")
+    parser.add_argument("--workers", type=int, default=None, help="Processes used for rendering (default: the CPU pool)")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Render N copies of a sample resume and report PDFs/sec")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        sample = None
+        if args.resumes:
+            with open(args.resumes[0], encoding="utf-8") as handle:
+                sample = handle.read()
+        for name, result in benchmark(args.benchmark, args.workers, sample).items():
+            print(f"{name:>6}: {result['pdfs']} PDFs in {result['seconds']}s with {result['workers']} worker(s)"
+                  f" = {result['pdfs_per_second']} PDFs/sec")
+        return 0
+
+    texts = []
+    for path in args.resumes:
+        with open(path, encoding="utf-8") as handle:
+            texts.append(handle.read())
+    os.makedirs(args.out_dir, exist_ok=True)
+    for path, data in zip(args.resumes, render_pdfs(texts, workers=args.workers)):
+        target = os.path.join(args.out_dir, os.path.splitext(os.path.basename(path))[0] + ".pdf")
+        with open(target, "wb") as handle:
+            handle.write(data)
+        print(target)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=16):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rezup-stage")
+        return _executor
+
+
+class StageError(Exception):
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+class PipelineRun:
+    def __init__(self, stages):
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+        self.status = {name: PENDING for name in stages}
+
+    @property
+    def ok(self):
+        return all(state == DONE for state in self.status.values())
+
+    def raise_for_failure(self):
+        for name, error in self.errors.items():
+            raise StageError(name, error) from error
+        cancelled = [name for name, state in self.status.items() if state == CANCELLED]
+        if cancelled:
+            raise StageError(cancelled[0], "cancelled")
+
+    def summary(self):
+        return {
+            name: {"status": self.status[name], "seconds": round(self.timings.get(name, 0.0), 4)}
+            for name in self.status
+        }
+
+
+class Pipeline:
+    def __init__(self, executor=None):
+        self.executor = executor
+        self.stages = {}
+        self._cancel = threading.Event()
+
+    def add(self, name, func, depends_on=()):
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        missing = [dep for dep in depends_on if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self.stages[name] = Stage(name, func, depends_on)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _execute(self, stage, run, kwargs):
+        started = time.perf_counter()
+        try:
+            return stage.func(**kwargs)
+        finally:
+            run.timings[stage.name] = time.perf_counter() - started
+
+    def run(self, timeout=None, on_update=None):
+        # on_update(run) is called each time a stage finishes, for progress reporting.
+        executor = self.executor or get_executor()
+        run = PipelineRun(self.stages)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        running = {}
+
+        def cancel_dependents(failed):
+            for stage in self.stages.values():
+                if run.status[stage.name] == PENDING and failed in stage.depends_on:
+                    run.status[stage.name] = CANCELLED
+                    cancel_dependents(stage.name)
+
+        while True:
+            if self._cancel.is_set():
+                for name, state in run.status.items():
+                    if state == PENDING:
+                        run.status[name] = CANCELLED
+            for stage in self.stages.values():
+                if run.status[stage.name] != PENDING:
+                    continue
+                if all(run.status[dep] == DONE for dep in stage.depends_on):
+                    kwargs = {dep: run.results[dep] for dep in stage.depends_on}
+                    run.status[stage.name] = RUNNING
+                    running[executor.submit(self._execute, stage, run, kwargs)] = stage.name
+            if not running:
+                break
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            finished, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not finished:
+                # Deadline hit: give up on in-flight stages and everything after them.
+                for future, name in running.items():
+                    future.cancel()
+                    run.status[name] = CANCELLED
+                    cancel_dependents(name)
+                break
+            for future in finished:
+                name = running.pop(future)
+                error = future.exception()
+                if error is None:
+                    run.results[name] = future.result()
+                    run.status[name] = DONE
+                else:
+                    run.errors[name] = error
+                    run.status[name] = FAILED
+                    cancel_dependents(name)
+            if on_update is not None:
+                on_update(run)
+        return run
@@ -0,0 +1,212 @@
+import base64
+import math
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from rezup.render import RenderOptions, render_pages, selected_pages, zoom_for
+from rezup.resume_store import UnreadablePDF
+from rezup.tracing import span
+
+CHARS_PER_TOKEN = 4
+IMAGE_TILE = 768
+IMAGE_TILE_TOKENS = 258
+MIN_PAGE_CHARS = 200
+MIN_PRINTABLE_RATIO = 0.9
+MIN_IMAGE_DPI = 96
+
+
+def estimate_text_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def estimate_image_tokens(width, height):
+    # Small images cost one tile; larger ones are billed per 768px tile.
+    if width <= IMAGE_TILE / 2 and height <= IMAGE_TILE / 2:
+        return IMAGE_TILE_TOKENS
+    return math.ceil(width / IMAGE_TILE) * math.ceil(height / IMAGE_TILE) * IMAGE_TILE_TOKENS
+
+
+def image_dimensions(data):
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if data[:2] == b"\xff\xd8":
+        index = 2
+        while index + 9 < len(data):
+            if data[index] != 0xFF:
+                index += 1
+                continue
+            marker = data[index + 1]
+            length = struct.unpack(">H", data[index + 2:index + 4])[0]
+            if marker in (0xC0, 0xC1, 0xC2):
+                height, width = struct.unpack(">HH", data[index + 5:index + 9])
+                return width, height
+            index += 2 + length
+    return None
+
+
+def estimate_part_tokens(part):
+    if isinstance(part, str):
+        return estimate_text_tokens(part)
+    mime_type = part.get("mime_type", "")
+    data = part.get("data", b"")
+    if mime_type == "text/plain":
+        if isinstance(data, str):
+            data = base64.b64decode(data)
+        return estimate_text_tokens(data.decode("utf-8", "replace"))
+    if isinstance(data, str):
+        data = base64.b64decode(data)
+    dimensions = image_dimensions(data)
+    return estimate_image_tokens(*dimensions) if dimensions else IMAGE_TILE_TOKENS
+
+
+def estimate_contents_tokens(contents):
+    return sum(estimate_part_tokens(part) for part in contents)
+
+
+def looks_readable(text):
+    if not text:
+        return False
+    printable = sum(1 for char in text if char.isprintable() or char.isspace())
+    return printable / len(text) >= MIN_PRINTABLE_RATIO and text.count("�") < len(text) * 0.01
+
+
+class InputPlan:
+    def __init__(self, mode, parts, estimates, reason):
+        self.mode = mode
+        self.parts = parts
+        self.estimates = estimates
+        self.reason = reason
+
+    def describe(self):
+        return {"mode": self.mode, "estimated_tokens": self.estimates, "reason": self.reason}
+
+
+def plan_resume_input(resume, text_parts, image_parts, render_options, mode=None):
+    mode = mode or os.getenv("REZUP_INPUT_MODE", "auto")
+    pages = [resume.pages[number] for number in selected_pages(resume.page_count, render_options)]
+    image_tokens = 0
+    image_dpi = None
+    for page in pages:
+        zoom = zoom_for(page["width"], page["height"], render_options)
+        image_tokens += estimate_image_tokens(page["width"] * zoom, page["height"] * zoom)
+        image_dpi = zoom * 72 if image_dpi is None else min(image_dpi, zoom * 72)
+    estimates = {"text": estimate_text_tokens(resume.text), "image": image_tokens}
+
+    # A representation only counts if the model can recover the whole resume from it. Text density is
+    # judged over the whole document, so a short last page doesn't push a text resume to images.
+    text_readable = looks_readable(resume.text)
+    text_ok = (
+        bool(resume.pages)
+        and sum(page["chars"] for page in resume.pages) >= MIN_PAGE_CHARS * len(resume.pages)
+        and text_readable
+    )
+    image_ok = bool(pages) and len(pages) == resume.page_count and image_dpi >= MIN_IMAGE_DPI
+
+    if not resume.pages and not text_readable:
+        # Extraction failed or found no pages: there is nothing to send in either form.
+        raise UnreadablePDF("The file could not be opened as a PDF")
+    if mode in ("text", "image"):
+        chosen, reason = mode, "forced by REZUP_INPUT_MODE"
+    elif text_ok and (not image_ok or estimates["text"] <= estimates["image"]):
+        chosen = "text"
+        reason = "text layer is complete and cheaper" if image_ok else "text layer is complete; page images would be too low-resolution"
+    elif image_ok:
+        chosen = "image"
+        reason = "page images are cheaper" if text_ok else "text layer is missing or sparse (scanned PDF?)"
+    elif text_readable:
+        chosen, reason = "text", "text layer is sparse, but page images would be too low-resolution"
+    else:
+        chosen, reason = "image", "text layer is missing or sparse; sending the best available page images"
+    parts = text_parts() if chosen == "text" else image_parts()
+    return InputPlan(chosen, parts, estimates, reason)
+
+
+def _traced_parts(name, resume, key, build, store):
+    # Traces a conversion: input and output sizes, and whether the store already had the parts.
+    with span(name) as trace:
+        built = []
+
+        def build_once():
+            built.append(True)
+            return build()
+        parts = store.memo(resume, key, build_once) if store else build_once()
+        trace.set(bytes_in=resume.byte_size, bytes_out=sum(len(part["data"]) for part in parts),
+                  cache=("miss" if built else "hit") if store else None)
+        return parts
+
+
+def convert_pdf_to_text(resume, store=None):
+    # Raw UTF-8 bytes: the client library encodes inline data itself, so base64 here only doubled the work.
+    def build():
+        return [{"mime_type": "text/plain", "data": resume.text.encode("utf-8")}]
+    return _traced_parts("convert_pdf_to_text", resume, "text_parts", build, store)
+
+
+def convert_pdf_to_image(resume, options, store=None):
+    def build():
+        return render_pages(resume.source, options, resume.page_count)
+    return _traced_parts("convert_pdf_to_image", resume, options.cache_key(), build, store)
+
+
+def prepare_resume_input(resume, store=None, options=None):
+    # Text-layer PDFs go out as text; scanned ones fall back to page images.
+    options = options or RenderOptions.from_env()
+    return plan_resume_input(resume, lambda: convert_pdf_to_text(resume, store),
+                             lambda: convert_pdf_to_image(resume, options, store), options)
+
+
+def contents_mode(contents):
+    modes = set()
+    for part in contents:
+        if isinstance(part, dict):
+            modes.add("text" if part.get("mime_type") == "text/plain" else "image")
+    return "+".join(sorted(modes)) or "none"
+
+
+class UsageLedger:
+    def __init__(self, max_entries=200):
+        self._recent = deque(maxlen=max_entries)
+        self._lock = threading.Lock()
+        self._totals = {"calls": 0, "estimated_tokens": 0, "actual_tokens": 0, "output_tokens": 0}
+
+    def record(self, contents, response):
+        estimated = estimate_contents_tokens(contents)
+        usage = getattr(response, "usage_metadata", None)
+        actual = getattr(usage, "prompt_token_count", 0) or 0
+        output = getattr(usage, "candidates_token_count", 0) or 0
+        entry = {
+            "time": time.time(),
+            "mode": contents_mode(contents),
+            "estimated_tokens": estimated,
+            "actual_tokens": actual,
+            "output_tokens": output,
+        }
+        with self._lock:
+            self._recent.append(entry)
+            self._totals["calls"] += 1
+            self._totals["estimated_tokens"] += estimated
+            self._totals["actual_tokens"] += actual
+            self._totals["output_tokens"] += output
+        return entry
+
+    def last(self):
+        with self._lock:
+            return self._recent[-1] if self._recent else None
+
+    def summary(self):
+        with self._lock:
+            summary = dict(self._totals)
+            summary["recent"] = list(self._recent)
+        if summary["actual_tokens"]:
+            summary["estimate_ratio"] = round(summary["estimated_tokens"] / summary["actual_tokens"], 3)
+        return summary
+
+
+_shared_ledger = UsageLedger()
+
+
+def get_usage_ledger():
+    return _shared_ledger
@@ -0,0 +1,74 @@
+input_prompt1 = """As an experienced Technical HR Manager with expertise in data science, AI, and tech fields, review this resume against the job description.
+Provide a professional evaluation of alignment with the role, highlighting:
+1. Key strengths matching the job requirements
+2. Potential weaknesses or gaps
+3. Overall suitability for the position
+Include a percentage match score at the top (e.g., "Current match: 65%")."""
+
+input_prompt2 = """As a career development coach specializing in tech fields, analyze this resume and job description to:
+1. Identify skill gaps between the candidate and job requirements
+2. Recommend specific skills to develop
+3. Suggest learning resources or pathways
+4. Provide actionable improvement steps"""
+
+input_prompt3 = """As an ATS optimization expert, evaluate this resume for:
+1. Percentage match with the job description (show as % at top)
+2. List of present keywords from the job description (with frequency)
+3. List of missing keywords from the job description
+4. Formatting issues that might affect ATS parsing
+5. Final recommendations for improvement
+Format clearly with headings for each section and provide specific metrics.
+Example format:
+Current ATS Match: 65%
+
+Present Keywords:
+- Python (3 mentions)
+- Machine Learning (2 mentions)
+
+Missing Keywords:
+- TensorFlow
+- Data Pipelines
+
+Formatting Issues:
+- Missing section headers
+- Inconsistent bullet points
+
+Recommendations:
+1. Add missing keywords naturally in context
+2. Standardize formatting
+3. Quantify achievements"""
+
+input_prompt4 = """As an ATS specialist, identify:
+1. The most important missing keywords from the resume
+2. Which job requirements aren't addressed
+3. Suggested additions to improve ATS ranking
+Present in a bullet-point list with priority indicators (High/Medium/Low).
+Include a percentage score at the top (e.g., "Current ATS match: 65%")."""
+
+input_prompt3_json = """As an ATS optimization expert, evaluate this resume against the job description.
+Reply with a single JSON object and nothing else, using exactly these fields:
+- "score": percentage match with the job description, an integer from 0 to 100
+- "present_keywords": keywords from the job description found in the resume, as objects with "keyword" and "count" (number of mentions)
+- "missing_keywords": keywords from the job description missing from the resume, as objects with "keyword" and "priority" ("High", "Medium" or "Low")
+- "formatting_issues": formatting problems that might affect ATS parsing, as strings
+- "recommendations": specific recommendations for improvement, as strings"""
+
+improved_resume_prompt = """Based on the job description and current resume, generate an improved resume that:
+    1. Incorporates all missing keywords and skills from the job description
+    2. Maintains the original structure but enhances content with quantifiable achievements
+    3. Optimizes for ATS systems with proper keyword placement
+    4. Presents information clearly and professionally
+    5. Uses active language and power verbs
+    6. Ensures consistent formatting throughout
+
+    Format the resume with these sections:
+    - Header (Name, Contact Info, LinkedIn)
+    - Professional Summary (tailored to the job)
+    - Technical Skills (categorized and matching job requirements)
+    - Work Experience (with quantified achievements using numbers/percentages)
+    - Education
+    - Certifications (if any)
+    - Projects (if relevant)
+
+    Make sure the content is concise, achievement-oriented, and perfectly tailored to the job description.
+    Include specific keywords from the job description naturally in context."""
@@ -0,0 +1,124 @@
+import math
+import os
+
+from rezup.cpu_pool import get_cpu_pool
+
+MIME_TYPES = {"jpeg": "image/jpeg", "png": "image/png"}
+
+# Rendering runs on the CPU pool. A document is split across several workers only when it has
+# enough pages to pay for opening it in each of them.
+PARALLEL_MIN_PAGES = 4
+# The planner only sends page images rendered at 96 DPI or more; below that small print stops being legible.
+DEFAULT_DPI = 96
+
+
+class RenderOptions:
+    def __init__(self, pages=None, dpi=DEFAULT_DPI, grayscale=False, max_pixels=None, image_format="png", jpg_quality=80):
+        if image_format not in MIME_TYPES:
+            raise ValueError(f"Unsupported image format '{image_format}'")
+        self.pages = None if pages is None else tuple(pages)
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.max_pixels = max_pixels
+        self.image_format = image_format
+        self.jpg_quality = jpg_quality
+
+    @classmethod
+    def from_env(cls, **overrides):
+        options = {
+            "pages": parse_page_range(os.getenv("REZUP_RENDER_PAGES", "")),
+            "dpi": int(os.getenv("REZUP_RENDER_DPI", DEFAULT_DPI)),
+            "grayscale": os.getenv("REZUP_RENDER_GRAYSCALE", "1") == "1",
+            "max_pixels": int(os.getenv("REZUP_RENDER_MAX_PIXELS", 1_000_000)) or None,
+            # Text and line art compress far better as grayscale PNG than as JPEG, and
+            # MuPDF's PNG encoder is several times faster than its JPEG one.
+            "image_format": os.getenv("REZUP_RENDER_FORMAT", "png"),
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def cache_key(self):
+        return ("image_parts", self.pages, self.dpi, self.grayscale, self.max_pixels,
+                self.image_format, self.jpg_quality)
+
+
+def parse_page_range(spec):
+    # "1-3,5" -> (0, 1, 2, 4); an empty spec means every page.
+    if not spec or not spec.strip():
+        return None
+    pages = []
+    for chunk in spec.split(","):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if "-" in chunk:
+            start, end = (int(value) for value in chunk.split("-", 1))
+            pages.extend(range(start - 1, end))
+        else:
+            pages.append(int(chunk) - 1)
+    return tuple(sorted(set(page for page in pages if page >= 0)))
+
+
+def zoom_for(width, height, options):
+    zoom = options.dpi / 72
+    if options.max_pixels:
+        pixels = width * zoom * height * zoom
+        if pixels > options.max_pixels:
+            zoom *= math.sqrt(options.max_pixels / pixels)
+    return zoom
+
+
+def selected_pages(page_count, options):
+    if options.pages is None:
+        return list(range(page_count))
+    return [number for number in options.pages if number < page_count]
+
+
+def _render_page(pdf_document, page_number, options):
+    import fitz
+
+    page = pdf_document.load_page(page_number)
+    zoom = zoom_for(page.rect.width, page.rect.height, options)
+    colorspace = fitz.csGRAY if options.grayscale else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    if options.image_format == "jpeg":
+        return pix.tobytes("jpeg", jpg_quality=options.jpg_quality)
+    return pix.tobytes("png")
+
+
+def open_pdf(source):
+    # source: PDF bytes or a file path; pool workers given a path read the file instead of a pickled copy.
+    import fitz
+
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _render_chunk(source, page_numbers, options):
+    with open_pdf(source) as pdf_document:
+        return [_render_page(pdf_document, number, options) for number in page_numbers]
+
+
+def _render_document(source, options):
+    with open_pdf(source) as pdf_document:
+        return [_render_page(pdf_document, number, options)
+                for number in selected_pages(pdf_document.page_count, options)]
+
+
+def render_pages(source, options=None, page_count=None):
+    # page_count (when the caller already knows it) lets long documents be split across workers.
+    options = options or RenderOptions()
+    pool = get_cpu_pool()
+    page_numbers = selected_pages(page_count, options) if page_count is not None else []
+    if pool.workers >= 2 and len(page_numbers) >= PARALLEL_MIN_PAGES:
+        chunks = [page_numbers[index::pool.workers] for index in range(pool.workers)]
+        chunks = [chunk for chunk in chunks if chunk]
+        rendered = {}
+        for chunk, chunk_images in zip(chunks, pool.map(_render_chunk, [(source, chunk, options) for chunk in chunks])):
+            rendered.update(zip(chunk, chunk_images))
+        images = [rendered[number] for number in page_numbers]
+    else:
+        images = pool.run(_render_document, source, options)
+    mime_type = MIME_TYPES[options.image_format]
+    return [{"mime_type": mime_type, "data": image} for image in images]
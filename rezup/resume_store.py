@@ -0,0 +1,260 @@
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from rezup.cpu_pool import CPUTaskError, get_cpu_pool
+from rezup.render import open_pdf
+from rezup.tracing import span
+
+
+class UnknownResume(LookupError):
+    def __init__(self, resume_id):
+        super().__init__(f"Unknown or expired resume_id '{resume_id}'; upload the resume again")
+        self.resume_id = resume_id
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ResumeTooLarge(ValueError):
+    status = 413
+
+
+class UnreadablePDF(CPUTaskError):
+    # Nothing could be extracted: not a PDF, or too damaged to open.
+    pass
+
+
+def _part_size(value):
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_part_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_part_size(item) for item in value)
+    return 0
+
+
+def _extract_pages(source, max_pages):
+    # Runs on the CPU pool: (text, pages, metadata, page_count, error name or None).
+    texts = []
+    pages = []
+    metadata = {}
+    page_count = 0
+    error = None
+    try:
+        with open_pdf(source) as pdf_document:
+            page_count = pdf_document.page_count
+            if max_pages is None or page_count <= max_pages:
+                metadata = {key: value for key, value in (pdf_document.metadata or {}).items() if value}
+                for page in pdf_document:
+                    page_text = page.get_text()
+                    texts.append(page_text)
+                    pages.append({"width": page.rect.width, "height": page.rect.height,
+                                  "chars": len(page_text.strip())})
+    except Exception as e:
+        print(f"Error converting PDF to text: {e}")
+        error = type(e).__name__
+    return "".join(texts), pages, metadata, page_count, error
+
+
+def extract_pdf(source, max_pages=None, pool=None):
+    # Raises CPUTaskError if the PDF hangs or crashes the parser; other parse errors give empty text.
+    # pool: a CPUPool other than the shared one, e.g. batch runs with their own worker count.
+    with span("extract_pdf") as trace:
+        text, pages, metadata, page_count, error = (pool or get_cpu_pool()).run(_extract_pages, source, max_pages)
+        trace.set(bytes_in=os.path.getsize(source) if isinstance(source, str) else len(source), bytes_out=len(text),
+                  error=error)
+    if max_pages is not None and page_count > max_pages:
+        raise ResumeTooLarge(f"Resume has {page_count} pages; the limit is {max_pages}")
+    return text, pages, metadata
+
+
+class ParsedResume:
+    # source: the PDF bytes, or the path of a spooled upload that is removed with the entry.
+    def __init__(self, resume_id, source, text, pages, metadata, byte_size=None):
+        self.id = resume_id
+        self.source = source
+        self.byte_size = len(source) if byte_size is None else byte_size
+        self.text = text
+        self.pages = pages
+        self.page_count = len(pages)
+        self.metadata = metadata
+        self.parts = {}
+        # Only what is held in memory counts against the store's byte budget.
+        self.size = (0 if isinstance(source, str) else len(source)) + len(text)
+        self.created = self.accessed = time.time()
+        if isinstance(source, str):
+            weakref.finalize(self, _remove_file, source)
+
+    @property
+    def data(self):
+        if isinstance(self.source, str):
+            with open(self.source, "rb") as handle:
+                return handle.read()
+        return self.source
+
+    def describe(self):
+        return {
+            "resume_id": self.id,
+            "size": self.byte_size,
+            "page_count": self.page_count,
+            "characters": len(self.text),
+            "metadata": self.metadata,
+        }
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ResumeStore:
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024, ttl=60 * 60, max_upload_bytes=None,
+                 max_pages=None, spool_bytes=1024 * 1024, spool_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_upload_bytes = max_upload_bytes
+        self.max_pages = max_pages
+        self.spool_bytes = spool_bytes
+        self.spool_dir = spool_dir
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _check_size(self, size):
+        if self.max_upload_bytes is not None and size > self.max_upload_bytes:
+            raise ResumeTooLarge(f"Resume is larger than the {self.max_upload_bytes // 1024} KB limit")
+
+    def add(self, data):
+        self._check_size(len(data))
+        resume_id = hashlib.sha256(data).hexdigest()
+        existing = self.get(resume_id, required=False)
+        if existing is not None:
+            return existing
+        return self._insert(resume_id, data)
+
+    def add_stream(self, stream):
+        # Hashes an upload in chunks and stops at the size limit. Small files stay in memory; larger
+        # ones are spooled to a temp file that fitz opens directly, so they are never held whole.
+        digest = hashlib.sha256()
+        buffer = io.BytesIO()
+        spool = None
+        size = 0
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                self._check_size(size)
+                digest.update(chunk)
+                if spool is None and size > self.spool_bytes:
+                    spool = tempfile.NamedTemporaryFile(prefix="rezup-upload-", suffix=".pdf", dir=self.spool_dir,
+                                                        delete=False)
+                    spool.write(buffer.getbuffer())
+                    buffer = None
+                (spool or buffer).write(chunk)
+        except BaseException:
+            if spool is not None:
+                spool.close()
+                _remove_file(spool.name)
+            raise
+        resume_id = digest.hexdigest()
+        existing = self.get(resume_id, required=False)
+        if spool is None:
+            return existing or self._insert(resume_id, buffer.getvalue())
+        spool.close()
+        if existing is not None:
+            _remove_file(spool.name)
+            return existing
+        try:
+            return self._insert(resume_id, spool.name, byte_size=size)
+        except BaseException:
+            _remove_file(spool.name)
+            raise
+
+    def _insert(self, resume_id, source, byte_size=None):
+        # Extract outside the lock so one large upload doesn't stall lookups for everyone else.
+        text, pages, metadata = extract_pdf(source, self.max_pages)
+        resume = ParsedResume(resume_id, source, text, pages, metadata, byte_size)
+        with self._lock:
+            if resume_id in self._entries:
+                return self._entries[resume_id]
+            self._entries[resume_id] = resume
+            self.total_bytes += resume.size
+            self._evict()
+        return resume
+
+    def get(self, resume_id, required=True):
+        with self._lock:
+            resume = self._entries.get(resume_id)
+            if resume is not None and self.ttl is not None and time.time() - resume.accessed > self.ttl:
+                self._remove(resume_id)
+                resume = None
+            if resume is None:
+                if required:
+                    raise UnknownResume(resume_id)
+                return None
+            resume.accessed = time.time()
+            self._entries.move_to_end(resume_id)
+            return resume
+
+    def memo(self, resume, key, build):
+        with self._lock:
+            if key in resume.parts:
+                return resume.parts[key]
+        value = build()
+        with self._lock:
+            if key not in resume.parts:
+                resume.parts[key] = value
+                growth = _part_size(value)
+                resume.size += growth
+                if resume.id in self._entries:
+                    self.total_bytes += growth
+                    self._evict(keep=resume.id)
+            return resume.parts[key]
+
+    def _remove(self, resume_id):
+        resume = self._entries.pop(resume_id)
+        self.total_bytes -= resume.size
+
+    def _evict(self, keep=None):
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                if len(self._entries) == 1:
+                    break
+                self._entries.move_to_end(oldest)
+                continue
+            self._remove(oldest)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_resume_store():
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = ResumeStore(
+                max_entries=int(os.getenv("REZUP_RESUME_STORE_SIZE", 128)),
+                max_bytes=int(os.getenv("REZUP_RESUME_STORE_MAX_BYTES", 256 * 1024 * 1024)),
+                ttl=float(os.getenv("REZUP_RESUME_STORE_TTL", 60 * 60)) or None,
+                max_upload_bytes=int(os.getenv("REZUP_MAX_UPLOAD_BYTES", 10 * 1024 * 1024)) or None,
+                max_pages=int(os.getenv("REZUP_MAX_PAGES", 20)) or None,
+                spool_bytes=int(os.getenv("REZUP_SPOOL_BYTES", 1024 * 1024)),
+            )
+        return _shared_store
@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from rezup.admission import Overloaded
+from rezup.ratelimit import TokenBucket
+
+INTERACTIVE = 0
+BATCH = 1
+
+# Quota (429), server errors and timeouts are worth retrying; bad requests are not.
+RETRYABLE_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error):
+    code = getattr(error, "code", None)
+    try:
+        return int(code) in RETRYABLE_CODES
+    except (TypeError, ValueError):
+        return False
+
+
+def backoff_delay(attempt, base_delay, max_delay, rng=random):
+    # "Full jitter": a random wait up to the exponential ceiling keeps retrying clients apart.
+    return rng.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class ModelScheduler:
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.request_bucket = TokenBucket.per_minute(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = (TokenBucket.per_minute(tokens_per_minute, burst=tokens_per_minute)
+                             if tokens_per_minute else None)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self._counts = {"calls": 0, "coalesced": 0, "retries": 0, "gave_up": 0}
+
+    def _try_take(self, tokens):
+        costs = [(self.request_bucket, 1), (self.token_bucket, tokens)]
+        costs = [(bucket, min(cost, bucket.capacity)) for bucket, cost in costs if bucket is not None]
+        wait = max(bucket.wait_time(cost) for bucket, cost in costs)
+        if wait:
+            return wait
+        # Only the head of the queue gets here, so nothing else drains the buckets in between.
+        for bucket, cost in costs:
+            bucket.try_acquire(cost)
+        return 0.0
+
+    def _acquire(self, priority, tokens):
+        # Waiters are served strictly by (priority, arrival), so interactive calls overtake batch ones.
+        if self.request_bucket is None and self.token_bucket is None:
+            return
+        with self._condition:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    if self._waiting[0] == ticket:
+                        wait = self._try_take(tokens)
+                        if not wait:
+                            return
+                    else:
+                        wait = None
+                    self._condition.wait(wait)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._condition.notify_all()
+
+    def call(self, func, key=None, priority=INTERACTIVE, tokens=1):
+        if key is not None:
+            with self._in_flight_lock:
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+            if not owner:
+                # An identical call is already running; share its outcome instead of paying twice.
+                self._count("coalesced")
+                return future.result()
+            try:
+                result = self._call_with_retries(func, priority, tokens)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._in_flight_lock:
+                    self._in_flight.pop(key, None)
+        return self._call_with_retries(func, priority, tokens)
+
+    def _call_with_retries(self, func, priority, tokens):
+        attempt = 0
+        while True:
+            self._acquire(priority, tokens)
+            self._count("calls")
+            try:
+                return func()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                delay = max(backoff_delay(attempt, self.base_delay, self.max_delay),
+                            getattr(e, "retry_after", None) or 0)
+                if attempt >= self.max_retries:
+                    self._count("gave_up")
+                    raise Overloaded(f"The model is unavailable after {attempt + 1} attempts: {e}",
+                                     max(1, round(delay)), 503) from e
+                self._count("retries")
+                attempt += 1
+                time.sleep(delay)
+
+    def _count(self, name):
+        with self._in_flight_lock:
+            self._counts[name] += 1
+
+    def stats(self):
+        with self._condition:
+            waiting = {"interactive": 0, "batch": 0}
+            for priority, _ in self._waiting:
+                waiting["interactive" if priority == INTERACTIVE else "batch"] += 1
+        with self._in_flight_lock:
+            return {**self._counts, "waiting": waiting, "in_flight_keys": len(self._in_flight)}
+
+
+_shared_scheduler = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = ModelScheduler(
+                requests_per_minute=float(os.getenv("REZUP_MODEL_RPM", 0)),
+                tokens_per_minute=float(os.getenv("REZUP_MODEL_TPM", 0)),
+                max_retries=int(os.getenv("REZUP_MODEL_RETRIES", 4)),
+                base_delay=float(os.getenv("REZUP_RETRY_BASE_DELAY", 1.0)),
+                max_delay=float(os.getenv("REZUP_RETRY_MAX_DELAY", 30.0)),
+            )
+        return _shared_scheduler
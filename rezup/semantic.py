@@ -0,0 +1,245 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from rezup.keyword_match import SKILL_ALIASES, STOPWORDS, canonical_terms, tokenize
+from rezup.tracing import traced
+
+# Canonical skill -> broader families it demonstrates, so "PyTorch" counts towards "deep learning frameworks".
+# Family names are features of their own: a requirement naming the family matches any member.
+SKILL_FAMILIES = {
+    "pytorch": ["deep learning", "machine learning"],
+    "tensorflow": ["deep learning", "machine learning"],
+    "keras": ["deep learning", "machine learning"],
+    "jax": ["deep learning", "machine learning"],
+    "deep learning": ["machine learning"],
+    "scikit-learn": ["machine learning"],
+    "xgboost": ["machine learning"],
+    "natural language processing": ["machine learning"],
+    "computer vision": ["deep learning", "machine learning"],
+    "large language models": ["generative ai", "natural language processing", "machine learning"],
+    "mlops": ["machine learning", "ci/cd"],
+    "aws": ["cloud"], "gcp": ["cloud"], "azure": ["cloud"],
+    "docker": ["containers"], "kubernetes": ["containers", "orchestration"], "helm": ["kubernetes", "containers"],
+    "terraform": ["infrastructure as code"], "cloudformation": ["infrastructure as code"],
+    "pulumi": ["infrastructure as code"], "ansible": ["infrastructure as code", "automation"],
+    "jenkins": ["ci/cd"], "circleci": ["ci/cd"], "github actions": ["ci/cd"],
+    "postgresql": ["sql", "databases"], "mysql": ["sql", "databases"], "sqlite": ["sql", "databases"],
+    "sql": ["databases"], "mongodb": ["nosql", "databases"], "cassandra": ["nosql", "databases"],
+    "dynamodb": ["nosql", "databases"], "redis": ["nosql", "caching"], "elasticsearch": ["search", "databases"],
+    "kafka": ["streaming", "messaging"], "kinesis": ["streaming"], "rabbitmq": ["messaging"],
+    "flink": ["streaming", "data pipelines"], "spark": ["big data", "data pipelines"],
+    "hadoop": ["big data"], "airflow": ["data pipelines", "orchestration"], "dbt": ["data pipelines"],
+    "react": ["frontend"], "angular": ["frontend"], "vue": ["frontend"], "css": ["frontend"], "html": ["frontend"],
+    "javascript": ["frontend"], "typescript": ["frontend"],
+    "rest api": ["apis", "backend"], "graphql": ["apis", "backend"], "grpc": ["apis", "backend"],
+    "microservices": ["backend", "distributed systems"], "flask": ["backend", "python"],
+    "django": ["backend", "python"], "fastapi": ["backend", "python"], "node.js": ["backend", "javascript"],
+    "prometheus": ["observability", "monitoring"], "grafana": ["observability", "monitoring"],
+    "datadog": ["observability", "monitoring"], "monitoring": ["observability"],
+    "data visualization": ["analytics"], "statistics": ["analytics"], "a/b testing": ["analytics", "statistics"],
+    "agile": ["project management"], "leadership": ["management"], "mentoring": ["leadership"],
+}
+
+KNOWN_SKILLS = frozenset(SKILL_ALIASES) | frozenset(SKILL_FAMILIES) | frozenset(
+    family for families in SKILL_FAMILIES.values() for family in families)
+
+# Feature kinds and their weights: canonical skills carry the meaning, families the synonyms, other
+# words the context, and their character trigrams catch inflections ("deploy" / "deployments").
+SKILL_WEIGHT = 3.0
+FAMILY_WEIGHT = 1.5
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.2
+LINE_PATTERN = re.compile(r"^\s*(?:[-*•▪◦]|\d+[.)])\s*")
+HEADING_PATTERN = re.compile(r"^\s*(#{1,6}\s+\S.*|[A-Z][A-Z &/]{2,}:?|\*\*[^*]+\*\*)\s*$")
+MIN_UNIT_WORDS = 3
+MAX_INDEXES = 128
+
+
+def embedding_dimensions():
+    return int(os.getenv("REZUP_EMBED_DIM", 2048))
+
+
+def coverage_threshold():
+    # Share of a requirement a resume unit must contain for it to count as covered; below it, partial credit.
+    return float(os.getenv("REZUP_SEMANTIC_THRESHOLD", 0.4))
+
+
+def _families(term, depth=2):
+    found = []
+    for family in SKILL_FAMILIES.get(term, []):
+        found.append(family)
+        if depth > 1:
+            found += _families(family, depth - 1)
+    return found
+
+
+def features(text):
+    # (feature, weight) pairs for one text. Known skills bring their families along; a family shares its
+    # feature with the skill of the same name, so "deep learning" in a JD meets "PyTorch" in a resume.
+    # Other words count for less and also add their character trigrams.
+    pairs = []
+    for term in canonical_terms(tokenize(text)):
+        if term in STOPWORDS:
+            continue
+        if term in KNOWN_SKILLS:
+            pairs.append(("s:" + term, SKILL_WEIGHT))
+            pairs += [("s:" + family, FAMILY_WEIGHT) for family in _families(term)]
+        elif len(term) >= 3:
+            pairs.append(("w:" + term, WORD_WEIGHT))
+            padded = f"<{term}>"
+            pairs += [("t:" + padded[index:index + 3], TRIGRAM_WEIGHT) for index in range(len(padded) - 2)]
+    return pairs
+
+
+def embed(texts, dimensions=None):
+    # Signed feature hashing into one float32 matrix, a row per text. Each feature counts once at its
+    # highest weight, so a row measures what a text is about, not how often it repeats it. crc32 rather
+    # than hash() keeps vectors identical across processes.
+    import numpy as np
+
+    dimensions = dimensions or embedding_dimensions()
+    rows, columns, values = [], [], []
+    for row, text in enumerate(texts):
+        weights = {}
+        for feature, weight in features(text):
+            weights[feature] = max(weight, weights.get(feature, 0.0))
+        for feature, weight in weights.items():
+            digest = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            columns.append(digest % dimensions)
+            values.append(weight if digest & 0x80000000 else -weight)
+    matrix = np.zeros((len(texts), dimensions), dtype=np.float32)
+    if rows:
+        np.add.at(matrix, (np.array(rows), np.array(columns)), np.array(values, dtype=np.float32))
+    return matrix
+
+
+def split_resume(text):
+    # Units to match against: every bullet or line with a few words, plus each section as a whole so
+    # requirements that span several bullets can still be covered.
+    units = []
+    section = "Summary"
+    section_lines = []
+
+    def close_section():
+        if len(section_lines) > 1:
+            units.append({"text": " ".join(section_lines), "section": section})
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if HEADING_PATTERN.match(stripped):
+            close_section()
+            section = stripped.strip("#*: ").title()
+            section_lines = []
+            continue
+        content = LINE_PATTERN.sub("", stripped)
+        section_lines.append(content)
+        if len(content.split()) >= MIN_UNIT_WORDS:
+            units.append({"text": content, "section": section})
+    close_section()
+    return units
+
+
+class EmbeddingIndex:
+    # Units (dicts with a "text") and their vectors as one NumPy matrix.
+    def __init__(self, units, dimensions=None):
+        import numpy as np
+
+        self.units = units
+        self.vectors = embed([unit["text"] for unit in units], dimensions)
+        self.squared_norms = np.maximum(np.einsum("ij,ij->i", self.vectors, self.vectors), 1e-9)
+
+    def __len__(self):
+        return len(self.units)
+
+    def coverage(self, other):
+        # Share of each unit here that each unit of other contains, for all pairs in one matrix product.
+        # Unlike cosine similarity, a long resume bullet is not penalised for covering more than asked.
+        import numpy as np
+
+        return np.clip((self.vectors @ other.vectors.T) / self.squared_norms[:, None], 0.0, 1.0)
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _cached_index(kind, text, build):
+    key = (kind, hashlib.sha256(text.encode("utf-8")).hexdigest(), embedding_dimensions())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    index = build()
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def requirement_index(job):
+    # job: a JobAnalysis. JDs without recognisable requirements fall back to all their sentences.
+    def build():
+        requirements = job.requirements() or [
+            {"text": sentence, "skills": [], "weight": 1.0, "required": True} for sentence in job.sentences[1:]]
+        return EmbeddingIndex(requirements)
+    return _cached_index("jd", job.text, build)
+
+
+def resume_index(resume_text):
+    return _cached_index("resume", resume_text, lambda: EmbeddingIndex(split_resume(resume_text)))
+
+
+def coverage_matrix(job, resume_text):
+    # requirements x resume units
+    return requirement_index(job).coverage(resume_index(resume_text))
+
+
+@traced("semantic_match")
+def semantic_match(job, resume_text, threshold=None):
+    # Requirement coverage without a model call. Each requirement takes the resume unit that covers the
+    # most of it; the score is the weighted share covered, with partial credit below the threshold.
+    import numpy as np
+
+    threshold = threshold or coverage_threshold()
+    requirements = requirement_index(job)
+    units = resume_index(resume_text)
+    if not len(requirements):
+        return {"semantic_score": 0, "requirements": [], "missing_requirements": []}
+    if len(units):
+        matrix = requirements.coverage(units)
+        best = matrix.argmax(axis=1)
+        coverage = matrix[np.arange(len(requirements)), best]
+    else:
+        best = np.zeros(len(requirements), dtype=int)
+        coverage = np.zeros(len(requirements), dtype=np.float32)
+    weights = np.array([requirement["weight"] for requirement in requirements.units], dtype=np.float32)
+    credit = np.minimum(coverage / threshold, 1.0)
+    results = []
+    for position, requirement in enumerate(requirements.units):
+        unit = units.units[best[position]] if coverage[position] > 0 else None
+        results.append({
+            "requirement": requirement["text"],
+            "required": requirement["required"],
+            "weight": requirement["weight"],
+            "coverage": round(float(coverage[position]), 3),
+            "covered": bool(coverage[position] >= threshold),
+            "evidence": unit["text"] if unit else None,
+            "section": unit["section"] if unit else None,
+        })
+    missing = sorted((result for result in results if not result["covered"]),
+                     key=lambda result: (not result["required"], -result["weight"], result["coverage"]))
+    return {
+        "semantic_score": round(100 * float(weights @ credit) / float(weights.sum())),
+        "requirements": results,
+        "missing_requirements": [{key: result[key] for key in ("requirement", "required", "coverage")}
+                                 for result in missing],
+    }
@@ -0,0 +1,64 @@
+import json
+import queue
+import threading
+from contextlib import nullcontext
+
+
+def stream_cached(cache, key, open_stream, on_complete=None, gate=None):
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    # The gate slot is held until the stream is drained or the consumer goes away.
+    with gate.slot() if gate is not None else nullcontext():
+        stream = open_stream()
+        for chunk in stream:
+            text = chunk.text
+            if text:
+                parts.append(text)
+                yield text
+    if on_complete is not None:
+        on_complete(stream)
+    # Only a fully consumed stream is cached; a client that disconnects early leaves nothing behind.
+    if parts:
+        cache.set(key, "".join(parts))
+
+
+def sse_event(data, event=None):
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class ChunkRelay:
+    def __init__(self):
+        self.run = None
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def put(self, text):
+        self._queue.put(text)
+
+    def start(self, pipeline, timeout=None):
+        def work():
+            try:
+                self.run = pipeline.run(timeout=timeout)
+            except Exception as e:
+                self.error = e
+
+        self._thread = threading.Thread(target=work, name="rezup-relay", daemon=True)
+        self._thread.start()
+        return self
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self._queue.get(timeout=0.05)
+            except queue.Empty:
+                if not self._thread.is_alive():
+                    break
+        while not self._queue.empty():
+            yield self._queue.get_nowait()
+        self._thread.join()
@@ -0,0 +1,196 @@
+import json
+import os
+import re
+
+from rezup.evaluation import extract_missing_keywords, extract_score_from_evaluation
+from rezup.job_analysis import get_job_analysis
+from rezup.prompts import input_prompt3, input_prompt3_json
+from rezup.scheduler import INTERACTIVE
+from rezup.tracing import span
+
+PRIORITIES = ("High", "Medium", "Low")
+
+# Sent to Gemini as response_schema and checked again locally, since older models ignore it.
+ATS_REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "present_keywords": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"keyword": {"type": "string"}, "count": {"type": "integer"}},
+                "required": ["keyword", "count"],
+            },
+        },
+        "missing_keywords": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"keyword": {"type": "string"}, "priority": {"type": "string", "enum": list(PRIORITIES)}},
+                "required": ["keyword", "priority"],
+            },
+        },
+        "formatting_issues": {"type": "array", "items": {"type": "string"}},
+        "recommendations": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["score", "present_keywords", "missing_keywords", "formatting_issues", "recommendations"],
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def validate(data, schema, path="$"):
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(data, dict):
+            raise SchemaError(f"{path}: expected an object")
+        for name in schema.get("required", ()):
+            if name not in data:
+                raise SchemaError(f"{path}: missing field '{name}'")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in data:
+                validate(data[name], subschema, f"{path}.{name}")
+    elif kind == "array":
+        if not isinstance(data, list):
+            raise SchemaError(f"{path}: expected an array")
+        for index, item in enumerate(data):
+            validate(item, schema["items"], f"{path}[{index}]")
+    elif kind == "integer":
+        if isinstance(data, bool) or not isinstance(data, int):
+            raise SchemaError(f"{path}: expected an integer")
+    elif kind == "string":
+        if not isinstance(data, str):
+            raise SchemaError(f"{path}: expected a string")
+        if "enum" in schema and data not in schema["enum"]:
+            raise SchemaError(f"{path}: expected one of {', '.join(schema['enum'])}")
+    return data
+
+
+def _load_json(text):
+    # Returns (data, repaired) for clean JSON, JSON in a code fence or among prose, or trailing commas.
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("no JSON object in the response")
+    candidate = re.sub(r",\s*([}\]])", r"\1", text[start:end + 1])
+    return json.loads(candidate), True
+
+
+def _coerce(data):
+    # Small, predictable fixes before validation: numeric strings, "72%", bare keyword strings.
+    if not isinstance(data, dict):
+        raise SchemaError("$: expected an object")
+    data["present_keywords"] = [{"keyword": item, "count": 1} if isinstance(item, str) else item
+                                for item in data.get("present_keywords") or []]
+    data["missing_keywords"] = [{"keyword": item, "priority": "Medium"} if isinstance(item, str) else item
+                                for item in data.get("missing_keywords") or []]
+    score = data.get("score")
+    if isinstance(score, float):
+        data["score"] = round(score)
+    elif isinstance(score, str) and re.fullmatch(r"\s*\d{1,3}\s*%?\s*", score):
+        data["score"] = int(score.strip().rstrip("%"))
+    for item in data.get("present_keywords", []):
+        if isinstance(item, dict) and isinstance(item.get("count"), str) and item["count"].isdigit():
+            item["count"] = int(item["count"])
+    for item in data.get("missing_keywords", []):
+        if isinstance(item, dict) and isinstance(item.get("priority"), str):
+            item["priority"] = item["priority"].strip().capitalize()
+            if item["priority"] not in PRIORITIES:
+                item["priority"] = "Medium"
+    for name in ("formatting_issues", "recommendations"):
+        data.setdefault(name, [])
+    if isinstance(data.get("score"), int):
+        data["score"] = max(0, min(100, data["score"]))
+    return data
+
+
+def _section(text, heading):
+    items = []
+    in_section = False
+    for line in text.split("\n"):
+        if heading in line.lower():
+            in_section = True
+        elif in_section and re.match(r"\s*(?:[-*•]|\d+\.)", line):
+            items.append(re.sub(r"^\s*(?:[-*•]|\d+\.)\s*", "", line).strip())
+        elif in_section and not line.strip() and items:
+            break
+    return items
+
+
+def from_free_text(text, job=None):
+    # Fallback for replies that are not JSON: the original regex parsers plus the prompt's section layout.
+    present = []
+    for item in _section(text, "present keywords"):
+        match = re.match(r"(.+?)\s*\((\d+)\s*mentions?\)", item)
+        present.append({"keyword": match.group(1), "count": int(match.group(2))} if match
+                       else {"keyword": item, "count": 1})
+    return {
+        "score": extract_score_from_evaluation(text),
+        "present_keywords": present,
+        "missing_keywords": [{"keyword": keyword, "priority": "Medium"}
+                             for keyword in extract_missing_keywords(text, job)],
+        "formatting_issues": _section(text, "formatting issues"),
+        "recommendations": _section(text, "recommendations"),
+    }
+
+
+def render_report(report):
+    # Same layout the free-text prompt produces, so displays and the regex parsers keep working.
+    lines = [f"Current ATS Match: {report['score']}%", "", "Present Keywords:"]
+    lines += [f"- {item['keyword']} ({item['count']} mentions)" for item in report["present_keywords"]] or ["- None"]
+    lines += ["", "Missing Keywords:"]
+    lines += [f"- {item['keyword']} ({item['priority']})" for item in report["missing_keywords"]] or ["- None"]
+    lines += ["", "Formatting Issues:"]
+    lines += [f"- {issue}" for issue in report["formatting_issues"]] or ["- None"]
+    lines += ["", "Recommendations:"]
+    lines += [f"{number}. {item}" for number, item in enumerate(report["recommendations"], start=1)] or ["- None"]
+    return "\n".join(lines)
+
+
+def parse_ats_report(text, job=None):
+    with span("parse_ats_report") as trace:
+        trace.set(bytes_in=len(text))
+        try:
+            data, repaired = _load_json(text)
+            report = validate(_coerce(data), ATS_REPORT_SCHEMA)
+            if job is not None:
+                report["missing_keywords"] = job.normalize_keywords(report["missing_keywords"],
+                                                                    key=lambda item: item["keyword"], rank=False)
+            source = "repaired" if repaired else "json"
+            display = render_report(report)
+        except ValueError:
+            report = from_free_text(text, job)
+            source = "text"
+            display = text
+    keys = ("score", "present_keywords", "missing_keywords", "formatting_issues", "recommendations")
+    return dict({key: report[key] for key in keys}, text=display, source=source)
+
+
+def missing_keyword_names(report):
+    return [item["keyword"] for item in report["missing_keywords"]]
+
+
+def structured_output_enabled():
+    return os.getenv("REZUP_STRUCTURED_OUTPUT", "1") == "1"
+
+
+def ats_prompt():
+    # The prompt get_ats_report sends in the current output mode.
+    return input_prompt3_json if structured_output_enabled() else input_prompt3
+
+
+def get_ats_report(input_text, pdf_content, respond=None, priority=INTERACTIVE):
+    # Returns the parsed report dict; its "text" field is what the UIs display. input_text is the JD.
+    if respond is None:
+        from rezup.gemini import get_gemini_response as respond
+    if structured_output_enabled():
+        text = respond(input_text, pdf_content, ats_prompt(), priority=priority, schema=ATS_REPORT_SCHEMA)
+    else:
+        text = respond(input_text, pdf_content, ats_prompt(), priority=priority)
+    return parse_ats_report(text, get_job_analysis(input_text))
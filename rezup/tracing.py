@@ -0,0 +1,193 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the duration histogram; they span PDF parsing (ms) to model calls (tens of s).
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FIELDS = ("bytes_in", "bytes_out", "tokens_in", "tokens_out")
+
+
+class Span:
+    __slots__ = ("name", "started", "seconds", "error", "cache", *FIELDS)
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.seconds = 0.0
+        self.error = None
+        self.cache = None
+        for field in FIELDS:
+            setattr(self, field, 0)
+
+    def set(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    def as_dict(self):
+        entry = {"name": self.name, "started": self.started, "seconds": round(self.seconds, 6)}
+        entry.update({field: getattr(self, field) for field in FIELDS if getattr(self, field)})
+        if self.cache:
+            entry["cache"] = self.cache
+        if self.error:
+            entry["error"] = self.error
+        return entry
+
+
+class Tracer:
+    # Per-operation totals and a duration histogram: a lock and a few additions per span, so it stays on.
+    def __init__(self, enabled=True, recent=200):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._recent = deque(maxlen=recent)
+
+    @contextmanager
+    def span(self, name):
+        span = Span(name)
+        if not self.enabled:
+            yield span
+            return
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.seconds = time.perf_counter() - started
+            self._record(span)
+
+    def _record(self, span):
+        with self._lock:
+            stats = self._operations.get(span.name)
+            if stats is None:
+                stats = self._operations[span.name] = {
+                    "count": 0, "errors": 0, "seconds": 0.0, "buckets": [0] * len(DURATION_BUCKETS),
+                    "cache_hits": 0, "cache_misses": 0, **{field: 0 for field in FIELDS},
+                }
+            stats["count"] += 1
+            stats["seconds"] += span.seconds
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span.seconds <= bound:
+                    stats["buckets"][index] += 1
+                    break
+            for field in FIELDS:
+                stats[field] += getattr(span, field)
+            if span.error:
+                stats["errors"] += 1
+            if span.cache == "hit":
+                stats["cache_hits"] += 1
+            elif span.cache == "miss":
+                stats["cache_misses"] += 1
+            self._recent.append(span)
+
+    def operations(self):
+        with self._lock:
+            return {name: dict(stats, buckets=list(stats["buckets"])) for name, stats in self._operations.items()}
+
+    def recent(self, limit=50):
+        # Clamped to what is kept; a limit of 0 or less returns nothing rather than everything.
+        limit = min(max(limit, 0), self._recent.maxlen)
+        with self._lock:
+            spans = list(self._recent)[-limit:] if limit else []
+        return [span.as_dict() for span in reversed(spans)]
+
+    def summary(self):
+        # Per-operation averages for dashboards and the Streamlit debug panel.
+        rows = []
+        for name, stats in sorted(self.operations().items()):
+            lookups = stats["cache_hits"] + stats["cache_misses"]
+            rows.append({
+                "operation": name,
+                "calls": stats["count"],
+                "errors": stats["errors"],
+                "avg_ms": round(1000 * stats["seconds"] / stats["count"], 2),
+                "total_s": round(stats["seconds"], 3),
+                "avg_bytes_in": stats["bytes_in"] // stats["count"],
+                "avg_bytes_out": stats["bytes_out"] // stats["count"],
+                "tokens_in": stats["tokens_in"],
+                "tokens_out": stats["tokens_out"],
+                "cache_hit_rate": round(stats["cache_hits"] / lookups, 3) if lookups else None,
+            })
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+            self._recent.clear()
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels.items()) + "}"
+
+
+def render_prometheus(tracer, extra=()):
+    # Prometheus text exposition format. extra: (name, type, help, [(labels dict, value)]) families.
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+
+    operations = tracer.operations()
+    lines.append("# HELP rezup_operation_duration_seconds Time spent in traced operations.")
+    lines.append("# TYPE rezup_operation_duration_seconds histogram")
+    for name, stats in sorted(operations.items()):
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+            cumulative += count
+            lines.append(f"rezup_operation_duration_seconds_bucket{_labels(operation=name, le=bound)} {cumulative}")
+        lines.append(f"rezup_operation_duration_seconds_bucket{_labels(operation=name, le='+Inf')} {stats['count']}")
+        lines.append(f"rezup_operation_duration_seconds_sum{_labels(operation=name)} {stats['seconds']:.6f}")
+        lines.append(f"rezup_operation_duration_seconds_count{_labels(operation=name)} {stats['count']}")
+    family("rezup_operation_errors_total", "counter", "Traced operations that raised.",
+           [({"operation": name}, stats["errors"]) for name, stats in sorted(operations.items())])
+    family("rezup_operation_bytes_total", "counter", "Payload bytes into and out of traced operations.",
+           [({"operation": name, "direction": direction}, stats[f"bytes_{direction}"])
+            for name, stats in sorted(operations.items()) for direction in ("in", "out")])
+    family("rezup_operation_tokens_total", "counter", "Model tokens reported by traced operations.",
+           [({"operation": name, "kind": kind}, stats[f"tokens_{kind}"])
+            for name, stats in sorted(operations.items()) for kind in ("in", "out") if stats[f"tokens_{kind}"]])
+    family("rezup_operation_cache_total", "counter", "Cache lookups made by traced operations.",
+           [({"operation": name, "result": result}, stats[field])
+            for name, stats in sorted(operations.items())
+            for result, field in (("hit", "cache_hits"), ("miss", "cache_misses"))
+            if stats["cache_hits"] or stats["cache_misses"]])
+    for name, kind, help_text, samples in extra:
+        family(name, kind, help_text, samples)
+    return "\n".join(lines) + "\n"
+
+
+_shared_tracer = None
+_shared_lock = threading.Lock()
+
+
+def get_tracer():
+    global _shared_tracer
+    if _shared_tracer is not None:
+        return _shared_tracer  # hot path: every span looks the tracer up
+    with _shared_lock:
+        if _shared_tracer is None:
+            _shared_tracer = Tracer(enabled=os.getenv("REZUP_TRACING", "1") == "1",
+                                    recent=int(os.getenv("REZUP_TRACE_RECENT", 200)))
+        return _shared_tracer
+
+
+def span(name):
+    return get_tracer().span(name)
+
+
+def traced(name):
+    # Looks the tracer up per call, so decorating at import time doesn't fix its configuration.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate